@@ -1,6 +1,7 @@
 from server import LocalServer
 from game import Game, GameConfig
 import threading
+import catalog
 import decks.dinosaurs
 import packets.server
 
@@ -30,6 +31,9 @@ class CustomServer(LocalServer):
             self._connected_users_lock.release()
 
 
+print('loading card catalogs...')
+catalog.load_deck(decks.dinosaurs.DinosaursDeck())
+
 print('starting server...')
 server = CustomServer(25565)
 server.start()
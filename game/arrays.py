@@ -0,0 +1,305 @@
+import numpy as np
+import cards
+import intents
+import snapshot
+
+# kinds of card
+MINION = 0
+ACTION = 1
+BASE = 2
+
+# zones of a card; in play, base and attached tell where
+DECK = 0
+HAND = 1
+DISCARD = 2
+PLAY = 3
+
+_COLUMNS = ('kind', 'zone', 'owner', 'base', 'attached', 'order', 'raw_power', 'modifier', 'threshold',
+            'vanilla')
+
+
+class ArrayState:
+    """ The rules state of one or more games with the same cards, as a structure of
+        arrays with a row per game and a column per card id:
+            kind       MINION, ACTION or BASE
+            zone       DECK, HAND, DISCARD or PLAY
+            owner      seat of the owner, -1 for bases
+            base       id of the base a card in play is on, an action on a minion
+                       being on the minion's base; -1 if none
+            attached   id of the minion an action is on, -1 if none
+            order      position in the card's zone: from the bottom of a deck, in
+                       hand or discard order, in board order for minions in play
+            raw_power  raw power of minions, the base power of their class out of play
+            modifier   what the modifiers add to the raw power of minions in play
+            threshold  power threshold of bases
+            vanilla    whether the card is a minion with no abilities or modifiers
+        and per game the points of each seat, the seat whose turn it is (-1 if none),
+        its minions and actions left, and whether vanilla minions may be played in
+        lockstep (see play_minions).
+
+        What the arrays do not hold, the modifier stacks, card memos, rules memo and
+        random state, rides along in the snapshot each game was taken with, so
+        restore puts a game back exactly as far as the arrays were left alone. """
+    def __init__(self, games, card_count, seats):
+        shape = (games, card_count)
+        self.kind = np.zeros(shape, dtype=np.int8)
+        self.zone = np.zeros(shape, dtype=np.int8)
+        self.owner = np.full(shape, -1, dtype=np.int8)
+        self.base = np.full(shape, -1, dtype=np.int32)
+        self.attached = np.full(shape, -1, dtype=np.int32)
+        self.order = np.zeros(shape, dtype=np.int32)
+        self.raw_power = np.zeros(shape, dtype=np.int16)
+        self.modifier = np.zeros(shape, dtype=np.int16)
+        self.threshold = np.full(shape, -1, dtype=np.int16)
+        self.vanilla = np.zeros(shape, dtype=bool)
+        self.points = np.zeros((games, seats), dtype=np.int32)
+        self.turn_seat = np.full(games, -1, dtype=np.int8)
+        self.minions_left = np.zeros(games, dtype=np.int16)
+        self.actions_left = np.zeros(games, dtype=np.int16)
+        self.lockstep = np.zeros(games, dtype=bool)
+        self.snapshots = [None]*games
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def power(self):
+        """ The power of the minions in play, 0 for other cards. """
+        in_play = (self.kind == MINION) & (self.zone == PLAY)
+        return np.where(in_play, np.maximum(self.raw_power.astype(np.int32) + self.modifier, 0), 0)
+
+    def base_power(self):
+        """ The total power of the minions on each base, by base id. """
+        return self._sum_by_base(self.power(), 1).reshape(self.kind.shape)
+
+    def player_power(self):
+        """ The power each seat has on each base, by base id and seat. """
+        seats = self.points.shape[1]
+        return self._sum_by_base(self.power(), seats, self.owner).reshape(self.kind.shape+(seats,))
+
+    def _sum_by_base(self, values, seats, seat=None):
+        games, card_count = self.kind.shape
+        on_base = (self.kind == MINION) & (self.zone == PLAY)
+        index = (np.arange(games)[:, None]*card_count + self.base)*seats
+        if seat is not None:
+            index = index + seat
+        return np.bincount(index[on_base], weights=values[on_base],
+                           minlength=games*card_count*seats).astype(np.int64)
+
+    def breaking(self):
+        """ Whether each base is in play with its power threshold reached. """
+        return (self.kind == BASE) & (self.zone == PLAY) & (self.base_power() >= self.threshold)
+
+    def winners(self, point_max):
+        """ The seat of the winner of each game, -1 if none: as LocalGame.get_winner,
+            the only player with the most points, if at least point_max. """
+        best = self.points.max(axis=1)
+        leaders = np.count_nonzero(self.points == best[:, None], axis=1)
+        return np.where((best >= point_max) & (leaders == 1), self.points.argmax(axis=1), -1)
+
+    def get_minions(self, owner=None, base=None, max_power=None):
+        """ Which cards are minions in play, of the seat owner, on base and of power
+            max_power or less where given. Each may be a number or an array with a
+            value per game. """
+        found = (self.kind == MINION) & (self.zone == PLAY)
+        if owner is not None:
+            found &= self.owner == np.reshape(owner, (-1, 1))
+        if base is not None:
+            found &= self.base == np.reshape(base, (-1, 1))
+        if max_power is not None:
+            found &= self.power() <= np.reshape(max_power, (-1, 1))
+        return found
+
+    def draw(self, count):
+        """ In each game with a turn, the player whose turn it is draws up to count
+            cards from the top of their deck, as LocalGame.draw_cards. A deck that
+            runs out is not refilled from the discard, which takes the game's random
+            state, so the number of cards drawn in each game is returned. """
+        games = len(self)
+        seat = self.turn_seat[:, None]
+        in_deck = (self.kind != BASE) & (self.zone == DECK) & (self.owner == seat) & (seat >= 0)
+        key = np.where(in_deck, self.order, -1)
+        top = np.argsort(-key, axis=1, kind='stable')[:, :count]
+        drawn = np.take_along_axis(key, top, axis=1) >= 0
+
+        in_hand = (self.zone == HAND) & (self.owner == seat)
+        next_order = np.where(in_hand, self.order, -1).max(axis=1)+1
+        rows = np.broadcast_to(np.arange(games)[:, None], top.shape)[drawn]
+        columns = top[drawn]
+        self.zone[rows, columns] = HAND
+        self.order[rows, columns] = (next_order[:, None] + np.arange(top.shape[1]))[drawn]
+        return np.count_nonzero(drawn, axis=1)
+
+    def play_minions(self, card_ids, base_ids):
+        """ In each game the player whose turn it is plays the minion card_ids[game]
+            on the base base_ids[game], as LocalGame.play_card does with the base
+            chosen. Only vanilla minions in that player's hand can be played this way,
+            with a minion left to play, in games where nothing but the rules handles
+            playing them (lockstep); a card id of -1 plays nothing. Returns whether
+            each game played its minion. """
+        rows = np.arange(len(self))
+        card_ids = np.asarray(card_ids)
+        base_ids = np.asarray(base_ids)
+        played = (card_ids >= 0) & self.lockstep & (self.minions_left > 0)
+        card_ids = np.where(played, card_ids, 0)
+        base_ids = np.where(played, base_ids, 0)
+        played &= ((self.kind[rows, card_ids] == MINION) & self.vanilla[rows, card_ids] &
+                   (self.zone[rows, card_ids] == HAND) & (self.owner[rows, card_ids] == self.turn_seat) &
+                   (self.kind[rows, base_ids] == BASE) & (self.zone[rows, base_ids] == PLAY))
+
+        in_play = (self.kind == MINION) & (self.zone == PLAY)
+        next_order = np.where(in_play, self.order, -1).max(axis=1)+1
+        rows, card_ids = rows[played], card_ids[played]
+        self.zone[rows, card_ids] = PLAY
+        self.base[rows, card_ids] = base_ids[played]
+        self.order[rows, card_ids] = next_order[played]
+        self.modifier[rows, card_ids] = 0
+        self.minions_left[rows] -= 1
+        return played
+
+
+def take(game):
+    """ The state of game, which is to be between plays, in a single row. """
+    taken = snapshot.take(game)
+    state = ArrayState(1, max(card.id for card in game.zones)+1, len(game.players))
+    kind, zone, owner, base, attached, order = (state.kind[0], state.zone[0], state.owner[0], state.base[0],
+                                                 state.attached[0], state.order[0])
+    for card in game.zones:
+        if isinstance(card, cards.MinionCard):
+            kind[card.id] = MINION
+            state.raw_power[0, card.id] = card.base_power
+            state.vanilla[0, card.id] = _is_vanilla(card.__class__)
+        elif isinstance(card, cards.ActionCard):
+            kind[card.id] = ACTION
+        else:
+            kind[card.id] = BASE
+            state.threshold[0, card.id] = card.power_threshold
+
+    def place(ids, card_zone, seat=-1):
+        ids = np.array(ids, dtype=np.int64)
+        zone[ids] = card_zone
+        owner[ids] = seat
+        order[ids] = np.arange(len(ids))
+
+    for seat, (points, deck, hand, discard) in enumerate(taken.players):
+        state.points[0, seat] = points
+        place(deck, DECK, seat)
+        place(hand, HAND, seat)
+        place(discard, DISCARD, seat)
+    place(taken.base_deck, DECK)
+    place(taken.base_discard, DISCARD)
+    place([b[0] for b in taken.bases], PLAY)
+    for base_id, power_threshold, power, player_power in taken.bases:
+        state.threshold[0, base_id] = power_threshold
+
+    for position, (minion_id, seat, base_id, raw_power, power, modifiers) in enumerate(taken.minions):
+        zone[minion_id], owner[minion_id], base[minion_id], order[minion_id] = PLAY, seat, base_id, position
+        state.raw_power[0, minion_id] = raw_power
+        state.modifier[0, minion_id] = power - raw_power
+    for position, (action_id, on, seat, target_id) in enumerate(taken.actions):
+        zone[action_id], owner[action_id], order[action_id] = PLAY, seat, position
+        if on == snapshot.ON_BASE:
+            base[action_id] = target_id
+        elif on == snapshot.ON_MINION:
+            base[action_id], attached[action_id] = base[target_id], target_id
+
+    if taken.turn is not None:
+        seat, attributes = taken.turn
+        attributes = dict(attributes)
+        state.turn_seat[0] = seat
+        state.minions_left[0] = attributes['minions_left']
+        state.actions_left[0] = attributes['actions_left']
+    state.lockstep[0] = _allows_lockstep(game)
+    state.snapshots[0] = taken
+    return state
+
+
+def stack(states):
+    """ One state with the rows of states, which are to be of games with the same cards. """
+    first = states[0]
+    for state in states[1:]:
+        if (state.kind.shape[1] != first.kind.shape[1] or state.points.shape[1] != first.points.shape[1] or
+                not np.array_equal(state.kind[0], first.kind[0])):
+            raise ValueError('Stacked states must be of games with the same cards')
+    stacked = ArrayState(0, first.kind.shape[1], first.points.shape[1])
+    for name in _COLUMNS+('points', 'turn_seat', 'minions_left', 'actions_left', 'lockstep'):
+        setattr(stacked, name, np.concatenate([getattr(s, name) for s in states]))
+    stacked.snapshots = [taken for state in states for taken in state.snapshots]
+    return stacked
+
+
+def restore(game, state, row=0):
+    """ Puts game, which has the same cards as the game row was taken from, in the
+        state of that row. """
+    taken = state.snapshots[row]
+    kind, zone, owner, base, attached, order, raw_power, threshold = (
+        getattr(state, name)[row] for name in ('kind', 'zone', 'owner', 'base', 'attached', 'order', 'raw_power',
+                                               'threshold'))
+    power = state.power()[row]
+    base_power = state.base_power()[row]
+    player_power = state.player_power()[row]
+    seats = state.points.shape[1]
+
+    def in_zone(found):
+        ids = np.flatnonzero(found)
+        return tuple(int(i) for i in ids[np.argsort(order[ids], kind='stable')])
+
+    rebuilt = snapshot.GameSnapshot()
+    held = kind != BASE
+    rebuilt.players = tuple((int(state.points[row, seat]), in_zone(held & (zone == DECK) & (owner == seat)),
+                             in_zone(held & (zone == HAND) & (owner == seat)),
+                             in_zone(held & (zone == DISCARD) & (owner == seat))) for seat in range(seats))
+
+    # seats keep their order on each base, which ties in the ranking follow
+    taken_seats = dict((b[0], [seat for seat, seat_power in b[3]]) for b in taken.bases)
+    bases = []
+    for base_id in in_zone((kind == BASE) & (zone == PLAY)):
+        base_seats = taken_seats.get(base_id, [])
+        base_seats = base_seats+[s for s in range(seats) if s not in base_seats and player_power[base_id, s] > 0]
+        bases.append((base_id, int(threshold[base_id]), int(base_power[base_id]),
+                      tuple((s, int(player_power[base_id, s])) for s in base_seats)))
+    rebuilt.bases = tuple(bases)
+
+    modifiers = dict((m[0], m[5]) for m in taken.minions)
+    rebuilt.minions = tuple((minion_id, int(owner[minion_id]), int(base[minion_id]), int(raw_power[minion_id]),
+                             int(power[minion_id]), modifiers.get(minion_id, ()))
+                            for minion_id in in_zone((kind == MINION) & (zone == PLAY)))
+    actions = []
+    for action_id in in_zone((kind == ACTION) & (zone == PLAY)):
+        if attached[action_id] >= 0:
+            actions.append((action_id, snapshot.ON_MINION, int(owner[action_id]), int(attached[action_id])))
+        elif base[action_id] >= 0:
+            actions.append((action_id, snapshot.ON_BASE, int(owner[action_id]), int(base[action_id])))
+        else:
+            actions.append((action_id, snapshot.ON_FIELD, int(owner[action_id]), None))
+    rebuilt.actions = tuple(actions)
+
+    rebuilt.base_deck = in_zone((kind == BASE) & (zone == DECK))
+    rebuilt.base_discard = in_zone((kind == BASE) & (zone == DISCARD))
+    if state.turn_seat[row] < 0:
+        rebuilt.turn = None
+    else:
+        attributes = dict(taken.turn[1]) if taken.turn is not None else {}
+        attributes['minions_left'] = int(state.minions_left[row])
+        attributes['actions_left'] = int(state.actions_left[row])
+        rebuilt.turn = (int(state.turn_seat[row]), tuple(attributes.items()))
+    breaking = tuple(b[0] for b in bases if b[2] >= b[1])
+    rebuilt.rules = (breaking, tuple(m for m in taken.rules[1] if kind[m] == MINION and zone[m] == PLAY))
+    rebuilt.memos = taken.memos
+    rebuilt.random = taken.random
+    rebuilt.card_id_counter = taken.card_id_counter
+    snapshot.restore(game, rebuilt)
+
+
+def _is_vanilla(card_class):
+    return (card_class.get_subscriptions is cards.Card.get_subscriptions and
+            card_class.get_modifiers is cards.MinionCard.get_modifiers)
+
+
+def _allows_lockstep(game):
+    """ Whether playing a vanilla minion only puts it on its base: nothing but the
+        rules and cards narrowed to other cards handle playing it. """
+    for intent_class in (intents.PlayMinion, intents.ResolveMinionAbility):
+        for subscription in game.intent_router.get_subscriptions(intent_class):
+            if subscription.card is None and getattr(subscription.handler, '__self__', None) is not game.rules:
+                return False
+    return True
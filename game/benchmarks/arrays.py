@@ -0,0 +1,73 @@
+# STRUCT-OF-ARRAYS BENCHMARK
+# run from the game directory: python -m benchmarks.arrays
+import time
+import numpy as np
+import arrays
+from simulation import fork, RandomAgent
+from benchmarks.search import midgame
+
+
+def _time(run, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def _games(count, players=3):
+    """ count games stopped a few plays in, of the same cards. """
+    games = []
+    seed = 0
+    while len(games) < count:
+        seed += 1
+        try:
+            games.append(midgame(seed, players, 3 + seed % 10))
+        except RuntimeError:
+            pass
+    return games
+
+
+def main(count=500):
+    games = _games(count)
+    state = arrays.stack([arrays.take(g) for g in games])
+    print('%d games, %d cards each' % (len(state), state.kind.shape[1]))
+
+    def object_totals():
+        for game in games:
+            [b.state.power for b in game.bases]
+            game.get_winner()
+            for base in game.bases:
+                game.board.get_minions_up_to(base, 2)
+
+    def array_totals():
+        state.base_power()
+        state.winners(games[0].point_max)
+        state.get_minions(max_power=2)
+    print('base totals, winners and targets, per game:')
+    print('  objects %8.2f us' % (_time(object_totals, 20)*1e6 / count))
+    print('  arrays  %8.2f us' % (_time(array_totals, 20)*1e6 / count))
+
+    print('take, per game    %8.1f us' % (_time(lambda: arrays.take(games[0]), 200)*1e6))
+    copy = fork(games[0], [RandomAgent(p) for p in range(len(games[0].players))])
+    one = arrays.take(games[0])
+    print('restore, per game %8.1f us' % (_time(lambda: arrays.restore(copy, one), 200)*1e6))
+
+    def lockstep():
+        batch = arrays.stack([state])
+        batch.draw(2)
+        hand = (batch.zone == arrays.HAND) & (batch.owner == batch.turn_seat[:, None]) & batch.vanilla
+        card_ids = np.where(hand.any(axis=1), hand.argmax(axis=1), -1)
+        base_ids = ((batch.kind == arrays.BASE) & (batch.zone == arrays.PLAY)).argmax(axis=1)
+        batch.play_minions(card_ids, base_ids)
+        batch.breaking()
+    print('lockstep draw and play, per game %8.2f us (%d of %d games in lockstep)' % (
+        _time(lockstep, 20)*1e6 / count, np.count_nonzero(state.lockstep), count))
+
+
+if __name__ == '__main__':
+    main()
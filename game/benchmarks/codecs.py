@@ -0,0 +1,32 @@
+# WIRE CODEC BENCHMARK
+# run from the game directory: python -m benchmarks.codecs
+import time
+import packets
+import packets.game
+from benchmarks.packets import game_state_packet
+
+
+def _encode_time(serializer, packet, codec, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            serializer.serialize(packet, codec)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def main(count=5000):
+    serializer = packets.game.PROTOCOL.serializer
+    packet = game_state_packet()
+    for codec in [packets.CODEC_JSON, packets.CODEC_BINARY]:
+        message = serializer.serialize(packet, codec)
+        size = len(message.encode('utf-8')) if isinstance(message, str) else len(message)
+        encode_time = _encode_time(serializer, packet, codec, count)
+        print('set_state %-8s %6d bytes %8.1f us/encode' % (codec, size, encode_time*1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# GAME SETUP BENCHMARK
+# run from the game directory: python -m benchmarks.gamesetup
+import asyncio
+import time
+from game import LocalGame, GameConfig
+from user import User
+from decks.dinosaurs import DinosaursDeck
+
+
+def set_up_game(loop, players, decks=10):
+    """ Everything a new game does before its first turn but asking for decks and
+        sending the cards: two decks per player, bases laid out and hands dealt. """
+    users = [User('player'+str(p)) for p in range(players)]
+    game = LocalGame(0, GameConfig(users, [DinosaursDeck() for d in range(decks)], seed=0), loop)
+    for player in game.players+list(reversed(game.players)):
+        player.decks.append(game.decks.pop())
+    game._create_cards()
+    game._deal()
+    return game
+
+
+def _setup_time(loop, players, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            set_up_game(loop, players)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def main(count=200):
+    loop = asyncio.new_event_loop()
+    try:
+        for players in [2, 3, 4]:
+            setup_time = _setup_time(loop, players, count)
+            print('%d players, 10 decks %8.1f us/game %8.0f games/sec' % (players, setup_time*1e6, 1/setup_time))
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
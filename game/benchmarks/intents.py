@@ -0,0 +1,151 @@
+# INTENT ROUTING BENCHMARK
+# run from the game directory: python -m benchmarks.intents
+import time
+import cards
+import intents
+import templates
+from game import LocalGame, GameConfig
+from user import User
+from decks.dinosaurs import DinosaursDeck, KingRex, WarRaptor, WildlifePreserve, ToothAndClawAndGuns
+
+
+def dinosaur_board(players=5, decks_per_player=2):
+    """ A game with every deck in play: all minions spread over the bases, Wildlife
+        Preserves on bases, Tooth and Claw... and Guns on minions, the other actions in hand. """
+    users = [User('player'+str(p)) for p in range(players)]
+    game = LocalGame(0, GameConfig(users, [DinosaursDeck() for d in range(players*decks_per_player)]))
+
+    all_bases = []
+    for player in game.players:
+        for d in range(decks_per_player):
+            deck = DinosaursDeck()
+            player.decks.append(deck)
+            template = templates.compile_deck(deck)
+            for base in template.create_bases(game, game._next_card_ids(len(template.base_classes))):
+                game.intent_router.register(base)
+                all_bases.append(base)
+    game.bases = all_bases[:players+1]
+    for base in game.bases:
+        game.zones.add(base, None, cards.BaseInPlayState(base.power_threshold))
+    for base in all_bases[players+1:]:
+        game.zones.add(base, game.base_deck, cards.BaseInDeckState())
+
+    idx = 0
+    for player in game.players:
+        for deck in player.decks:
+            template = templates.compile_deck(deck)
+            deck_cards = template.create_cards(player, game._next_card_ids(len(template.card_classes)))
+            minions = [c for c in deck_cards if isinstance(c, cards.MinionCard)]
+            for card in deck_cards:
+                game.intent_router.register(card)
+                if isinstance(card, cards.MinionCard):
+                    base = game.bases[idx % len(game.bases)]
+                    idx += 1
+                    game.zones.add(card, base.state.minions, cards.MinionOnBaseState(player, base, card.base_power))
+                    base.state.add_power(player, card.state.power)
+                    game.board.add_minion(card)
+                elif isinstance(card, WildlifePreserve):
+                    base = game.bases[idx % len(game.bases)]
+                    game.zones.add(card, base.state.actions, cards.ActionOnBaseState(player, base))
+                elif isinstance(card, ToothAndClawAndGuns):
+                    game.zones.add(card, minions[0].state.actions, cards.ActionOnMinionState(player, minions[0]))
+                else:
+                    game.zones.add(card, player.hand, cards.InHandState())
+    return game
+
+
+def _run(coroutine):
+    """ Handlers that do not wait on a selection finish within a single step. """
+    try:
+        coroutine.send(None)
+    except StopIteration:
+        return
+    raise RuntimeError('Intent handler waited on a selection')
+
+
+def _rate(router, make_intent, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            _run(router.route_intent(make_intent()))
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def _rate_singly(router, make_intents, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            for intent in make_intents():
+                _run(router.route_intent(intent))
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def _rate_batch(router, make_intents, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            _run(router.route_intents(make_intents()))
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def _rate_states(card, states, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            card.state = states[i % len(states)]
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def main(count=20000):
+    game = dinosaur_board()
+    router = game.intent_router
+    minions = [m for b in game.bases for m in b.state.minions]
+    rex = [m for m in minions if isinstance(m, KingRex)][0]
+    player = game.players[0]
+    # modifiers accumulate on minions in play, so power is modified on one in hand
+    spare = KingRex(game._next_card_ids(1), player)
+    game.intent_router.register(spare)
+    game.zones.add(spare, player.hand, cards.InHandState())
+    print('%d decks, %d bases and %d minions in play' % (
+        sum([len(p.decks) for p in game.players]), len(game.bases), len(minions)))
+
+    routed = [
+        ('ModifyMinionPower', lambda: intents.ModifyMinionPower(spare, 1)),
+        ('ResolveMinionAbility', lambda: intents.ResolveMinionAbility(rex)),
+        ('PlayMinion', lambda: intents.PlayMinion(rex, game.bases[0])),
+        ('StartTurn', lambda: intents.StartTurn(player)),
+        ('MoveMinion', lambda: intents.MoveMinion(rex, game.bases[0])),
+    ]
+    for name, make_intent in routed:
+        print('route %-22s %10.0f intents/sec' % (name, _rate(router, make_intent, count)))
+
+    # moving every minion to the base it is on is cancelled or resolves to nothing
+    moves = lambda: [intents.MoveMinion(m, m.state.base) for m in minions]
+    print('route %-22s %10.0f passes/sec' % ('MoveMinion x40 singly', _rate_singly(router, moves, count // 40)))
+    print('route %-22s %10.0f passes/sec' % ('MoveMinion x40 batch', _rate_batch(router, moves, count // 40)))
+
+    # every state change of a card in play re-subscribes it
+    raptor = [m for m in minions if isinstance(m, WarRaptor)][0]
+    states = [cards.MinionOnBaseState(raptor.state.owner, b, raptor.base_power) for b in game.bases[:2]]
+    states += [cards.InHandState(), cards.InDiscardState()]
+    print('state change %-15s %10.0f changes/sec' % ('WarRaptor', _rate_states(raptor, states, count)))
+
+
+if __name__ == '__main__':
+    main()
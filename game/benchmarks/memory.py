@@ -0,0 +1,48 @@
+# MEMORY BENCHMARK
+# run from the game directory: python -m benchmarks.memory
+import asyncio
+import tracemalloc
+from game import LocalGame, GameConfig
+from user import User
+from decks.dinosaurs import DinosaursDeck, KingRex
+
+
+def live_game(loop, players=4, decks=10):
+    """ A game after deck selection, its cards created and in the players' decks. """
+    users = [User('player'+str(p)) for p in range(players)]
+    game = LocalGame(0, GameConfig(users, [DinosaursDeck() for d in range(decks)], seed=0), loop)
+    for player in game.players+list(reversed(game.players)):
+        player.decks.append(game.decks.pop())
+    game._create_cards()
+    return game
+
+
+def _allocated(create, count):
+    """ Bytes still allocated per object count objects after creating them. """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    live = [create() for i in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del live
+    return allocated / count
+
+
+def main(count=50):
+    loop = asyncio.new_event_loop()
+    try:
+        game = live_game(loop)
+        card_count = len(game.zones)
+        per_game = _allocated(lambda: live_game(loop), count)
+        player = game.players[0]
+        per_card = _allocated(lambda: KingRex(0, player), count*100)
+        print('%d cards per game' % card_count)
+        print('live game %10.0f bytes' % per_game)
+        print('per card  %10.1f bytes in the game, %.1f bytes for the card object' % (
+            per_game / card_count, per_card))
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
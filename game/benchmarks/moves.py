@@ -0,0 +1,34 @@
+# LEGAL MOVE GENERATION BENCHMARK
+# run from the game directory: python -m benchmarks.moves
+import time
+from benchmarks.search import midgame
+
+
+def _time(run, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def main(count=20000):
+    game = midgame()
+    player = game.turn_state.player
+    moves = game.get_legal_moves(player)
+    print('%d cards in hand, %d playable' % (len(player.hand), len(moves)))
+
+    def generate():
+        game.move_table.clear()
+        game.get_legal_moves(player)
+    print('generate        %8.2f us' % (_time(generate, count)*1e6))
+    print('cached          %8.2f us' % (_time(lambda: game.get_legal_moves(player), count)*1e6))
+    print('reject a play   %8.2f us' % (_time(lambda: -1 in game.get_legal_moves(player), count)*1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# PACKET SERIALIZATION BENCHMARK
+# run from the game directory: python -m benchmarks.packets
+import json
+import time
+import packets
+import packets.game
+
+
+def game_state_packet():
+    bases = [{
+        'id': 100+b,
+        'power_total': 12,
+        'cards': [{'id': b*10+c, 'power': 3, 'actions': [{'id': 500+c, 'actions': []}]} for c in range(4)]
+    } for b in range(5)]
+    players = [{'name': 'player'+str(p), 'points': p, 'hand_size': 6, 'discard': list(range(8))} for p in range(4)]
+    turn = {'name': 'player0', 'minions': 1, 'actions': 1}
+    return packets.game.SetGameStatePacket(1, bases, players, turn, list(range(200, 206)), 1)
+
+
+def _rate(fn, arg, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            fn(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def main(count=20000):
+    serializer = packets.game.PROTOCOL.serializer
+    deserializer = packets.game.PROTOCOL.deserializer
+    options = [{'id': i, 'type': 'card', 'card_id': i} for i in range(5)]
+    encode = [
+        ('request_selection', packets.game.RequestSelectionPacket(3, 'Choose a minion.', options)),
+        ('set_state', game_state_packet())
+    ]
+    decode = [
+        ('reply_selection', json.dumps({'__packet_name': 'reply_selection', 'request_id': 3, 'option_id': 1})),
+        ('play_card', json.dumps({'__packet_name': 'play_card', 'card_id': 7})),
+        ('end_turn', json.dumps({'__packet_name': 'end_turn'}))
+    ]
+    for name, packet in encode:
+        n = count // 10 if name == 'set_state' else count
+        print('serialize   %-18s %10.0f packets/sec' % (name, _rate(serializer.serialize, packet, n)))
+    for name, message in decode:
+        print('deserialize %-18s %10.0f packets/sec' % (name, _rate(deserializer.deserialize, message, count)))
+
+
+if __name__ == '__main__':
+    main()
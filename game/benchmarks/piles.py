@@ -0,0 +1,47 @@
+# PILE BENCHMARK
+# run from the game directory: python -m benchmarks.piles
+import random
+import time
+from pile import Pile
+
+
+class _Card:
+    def __init__(self, id):
+        self.id = id
+
+
+def _time(run, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def main(count=200):
+    rng = random.Random(0)
+    for size in [40, 400, 4000]:
+        pile = Pile(rng, [_Card(i) for i in range(size)])
+        shuffle_time = _time(pile.shuffle, count)
+
+        def draw():
+            drawn = pile.remove_top_many(size)
+            for card in drawn:
+                pile.add_top(card)
+        draw_time = _time(draw, count)
+
+        def cycle():
+            # every card from the top to the bottom, as Tar Pits puts a minion
+            for i in range(size):
+                pile.add_bottom(pile.remove_top())
+        cycle_time = _time(cycle, count)
+        print('%5d cards shuffle %9.1f us   draw all %9.1f us   top to bottom %9.1f us' % (
+            size, shuffle_time*1e6, draw_time*1e6, cycle_time*1e6))
+
+
+if __name__ == '__main__':
+    main()
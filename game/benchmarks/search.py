@@ -0,0 +1,83 @@
+# SNAPSHOT AND SEARCH BENCHMARK
+# run from the game directory: python -m benchmarks.search
+import time
+from game import GameConfig
+from simulation import HeadlessGame, RandomAgent, fork
+from search import SearchAgent
+from user import User
+from decks.dinosaurs import DinosaursDeck
+
+
+class _Pause(Exception):
+    pass
+
+
+class _PausingAgent(RandomAgent):
+    """ Stops the game at its plays-th play. """
+    def __init__(self, seed, plays):
+        super().__init__(seed)
+        self.plays = plays
+
+    def choose_play(self, game, player, playable):
+        self.plays -= 1
+        if self.plays == 0:
+            raise _Pause()
+        return super().choose_play(game, player, playable)
+
+
+def _game(seed, agents):
+    users = [User('player'+str(p)) for p in range(len(agents))]
+    return HeadlessGame(seed, GameConfig(users, [DinosaursDeck() for d in range(10)], seed=seed), agents)
+
+
+def midgame(seed=5, players=3, plays=8):
+    """ A game stopped between two plays a few turns in. """
+    game = _game(seed, [_PausingAgent(seed, plays)]+[RandomAgent(seed+p) for p in range(1, players)])
+    try:
+        game.play()
+    except _Pause:
+        return game
+    raise RuntimeError('Game ended before pausing')
+
+
+def _time(run, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def main(count=500, games=10):
+    game = midgame()
+    taken = game.take_snapshot()
+    copy = fork(game, [RandomAgent(p) for p in range(len(game.players))])
+    print('%d minions in play, turn %d' % (len(game.board.get_minions()), game.turns))
+    print('take snapshot    %8.1f us' % (_time(game.take_snapshot, count)*1e6))
+    print('restore snapshot %8.1f us' % (_time(lambda: copy.restore_snapshot(taken), count)*1e6))
+    print('fork             %8.1f us' % (_time(lambda: fork(game, [RandomAgent(0)]*3), count // 10)*1e6))
+
+    def rollout():
+        copy.restore_snapshot(taken)
+        copy.max_turns = copy.turns+6
+        copy.play_on()
+    print('rollout, 6 turns %8.1f us' % (_time(rollout, count // 5)*1e6))
+
+    wins = 0
+    start = time.perf_counter()
+    for seed in range(games):
+        search = SearchAgent(rollouts=100, seed=seed)
+        agents = [search, RandomAgent(seed)] if seed % 2 == 0 else [RandomAgent(seed), search]
+        game = _game(seed, agents)
+        winner = game.play()
+        if winner is not None and game.agents[winner] is search:
+            wins += 1
+    print('search vs random: %d of %d games won, %.1f s/game' % (wins, games, (time.perf_counter()-start) / games))
+
+
+if __name__ == '__main__':
+    main()
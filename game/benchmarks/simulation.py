@@ -0,0 +1,31 @@
+# HEADLESS SIMULATION BENCHMARK
+# run from the game directory: python -m benchmarks.simulation
+import time
+from game import GameConfig
+from simulation import HeadlessGame, RandomAgent
+from user import User
+from decks.dinosaurs import DinosaursDeck
+
+
+def random_game(seed, players):
+    users = [User('player'+str(p)) for p in range(players)]
+    config = GameConfig(users, [DinosaursDeck() for d in range(10)], seed=seed)
+    return HeadlessGame(seed, config, [RandomAgent(seed*players+p) for p in range(players)])
+
+
+def main(count=200):
+    for players in [2, 3, 4]:
+        turns, plays = 0, 0
+        start = time.perf_counter()
+        for seed in range(count):
+            game = random_game(seed, players)
+            game.play()
+            turns += game.turns
+            plays += game.plays
+        elapsed = time.perf_counter() - start
+        print('%d players %8.1f games/sec %6.1f turns/game %6.1f plays/game' % (
+            players, count / elapsed, turns / count, plays / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# ZOBRIST HASH AND TRANSPOSITION TABLE BENCHMARK
+# run from the game directory: python -m benchmarks.zobrist
+import time
+from search import SearchAgent
+from simulation import RandomAgent
+from zobrist import TranspositionTable
+from benchmarks.search import midgame, _game
+
+
+def _time(run, count, rounds=5):
+    best = None
+    for r in range(rounds):
+        start = time.perf_counter()
+        for i in range(count):
+            run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+
+def main(count=10000, games=4):
+    game = midgame()
+    zobrist = game.zobrist
+    print('hash %016x, %d cards' % (zobrist.get_value(), len(game.zones)))
+    print('read hash      %8.2f us' % (_time(zobrist.get_value, count)*1e6))
+    print('read view      %8.2f us' % (_time(lambda: zobrist.get_view(1), count)*1e6))
+    print('recompute hash %8.2f us' % (_time(zobrist.reset, count // 100)*1e6))
+
+    table = TranspositionTable(1024)
+    keys = list(range(4096))
+    for k in keys:
+        table.put(k, k)
+
+    def churn():
+        for k in keys:
+            if table.get(k) is None:
+                table.put(k, k)
+    print('table get/put  %8.2f us' % (_time(churn, 10)*1e6 / len(keys)))
+
+    hits, misses = 0, 0
+    start = time.perf_counter()
+    for seed in range(games):
+        search = SearchAgent(rollouts=50, seed=seed)
+        game = _game(seed, [search, RandomAgent(seed)])
+        game.play()
+        hits += search._fork.move_table.hits + game.move_table.hits
+        misses += search._fork.move_table.misses + game.move_table.misses
+    print('search, %d games: %.1f s, legal moves from the table: %d hits, %d misses' % (
+        games, time.perf_counter()-start, hits, misses))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class Board:
+    """ Index of the minions in play by owner, base and card class, with the minions
+        of each base ordered by power. The rules keep it up to date as minions come,
+        go and change power. """
+    def __init__(self):
+        self._minions = {}
+        self._by_owner = {}
+        self._by_class = {}
+        self._by_base = {}
+        self._bases_by_owner = {}
+
+    def add_minion(self, minion):
+        state = minion.state
+        self._minions[minion] = None
+        self._by_owner.setdefault(state.owner, {})[minion] = None
+        self._by_class.setdefault(minion.__class__, {})[minion] = None
+        index = self._by_base.get(state.base)
+        if index is None:
+            index = _BaseIndex()
+            self._by_base[state.base] = index
+        index.add(minion)
+        bases = self._bases_by_owner.setdefault(state.owner, {})
+        bases[state.base] = bases.get(state.base, 0) + 1
+
+    def remove_minion(self, minion):
+        state = minion.state
+        del self._minions[minion]
+        _remove(self._by_owner, state.owner, minion)
+        _remove(self._by_class, minion.__class__, minion)
+        index = self._by_base[state.base]
+        index.remove(minion)
+        if len(index.minions) == 0:
+            del self._by_base[state.base]
+        bases = self._bases_by_owner[state.owner]
+        bases[state.base] -= 1
+        if bases[state.base] == 0:
+            del bases[state.base]
+
+    def update_power(self, minion):
+        self._by_base[minion.state.base].update(minion)
+
+    def get_minions(self, owner=None, base=None, card_class=None):
+        """ The minions in play, of owner, on base and of card_class where given. """
+        candidates = [self._minions]
+        if owner is not None:
+            candidates.append(self._by_owner.get(owner, {}))
+        if base is not None:
+            index = self._by_base.get(base)
+            candidates.append(index.minions if index is not None else {})
+        if card_class is not None:
+            candidates.append(self._by_class.get(card_class, {}))
+        return [m for m in min(candidates, key=len)
+                if (owner is None or m.state.owner == owner) and
+                   (base is None or m.state.base == base) and
+                   (card_class is None or m.__class__ is card_class)]
+
+    def count(self, base, card_class):
+        index = self._by_base.get(base)
+        return index.counts.get(card_class, 0) if index is not None else 0
+
+    def get_weakest(self, base):
+        """ The minions with the lowest power on base. """
+        index = self._by_base.get(base)
+        if index is None:
+            return []
+        power = index.keys[0][0]
+        return index.get_range(bisect_right(index.keys, (power, _MAX_ID)))
+
+    def get_minions_up_to(self, base, power):
+        """ The minions on base with at most the given power, lowest first. """
+        index = self._by_base.get(base)
+        if index is None:
+            return []
+        return index.get_range(bisect_right(index.keys, (power, _MAX_ID)))
+
+    def get_bases(self, owner):
+        """ The bases where owner has a minion. """
+        return list(self._bases_by_owner.get(owner, {}))
+
+
+class _BaseIndex:
+    """ The minions on one base; keys holds (power, card id) in order. """
+    def __init__(self):
+        self.minions = {}
+        self.counts = {}
+        self.keys = []
+        self._by_id = {}
+
+    def add(self, minion):
+        cls = minion.__class__
+        self.counts[cls] = self.counts.get(cls, 0) + 1
+        key = (minion.state.power, minion.id)
+        self.minions[minion] = key
+        insort(self.keys, key)
+        self._by_id[minion.id] = minion
+
+    def remove(self, minion):
+        cls = minion.__class__
+        self.counts[cls] -= 1
+        if self.counts[cls] == 0:
+            del self.counts[cls]
+        key = self.minions.pop(minion)
+        del self.keys[bisect_left(self.keys, key)]
+        del self._by_id[minion.id]
+
+    def update(self, minion):
+        key = self.minions[minion]
+        if key[0] != minion.state.power:
+            del self.keys[bisect_left(self.keys, key)]
+            key = (minion.state.power, minion.id)
+            self.minions[minion] = key
+            insort(self.keys, key)
+
+    def get_range(self, end):
+        return [self._by_id[key[1]] for key in self.keys[:end]]
+
+
+_MAX_ID = float('inf')
+
+
+def _remove(index, key, minion):
+    minions = index[key]
+    del minions[minion]
+    if len(minions) == 0:
+        del index[key]
@@ -1,112 +1,263 @@
 import intents
+from zones import Zone
 
 
 class CardState(object):
-    pass
+    __slots__ = ()
+    zone = None
 
 
 class InPlayState(CardState):
+    __slots__ = ('owner',)
+    zone = intents.ZONE_PLAY
+
     def __init__(self, owner):
         super().__init__()
         self.owner = owner
 
 
 class OnBaseState(InPlayState):
+    __slots__ = ('base',)
+
     def __init__(self, owner, base):
         super().__init__(owner)
         self.base = base
 
 
 class OnMinionState(InPlayState):
+    __slots__ = ('minion',)
+
     def __init__(self, owner, minion):
         super().__init__(owner)
         self.minion = minion
 
 
+UNTIL_END_OF_TURN = 'end_of_turn'
+WHILE_ATTACHED = 'attached'
+WHILE_ON_BASE = 'on_base'
+WHILE_IN_PLAY = 'in_play'
+
+DEPENDS_BASE = 'base'
+DEPENDS_TURN = 'turn'
+
+
+class Modifier(object):
+    """ A change to the power of a minion by source, lasting for duration:
+        UNTIL_END_OF_TURN  removed at the end of the current turn
+        WHILE_ATTACHED     removed when source, an action on the minion, leaves it
+        WHILE_ON_BASE      removed when the minion leaves the base it is on
+        WHILE_IN_PLAY      removed when the minion leaves play
+        off is a number, or a function of the minion's state for modifiers that change
+        with the minions on the base (DEPENDS_BASE) or with the turn (DEPENDS_TURN). """
+    __slots__ = ('source', 'off', 'duration', 'depends')
+
+    def __init__(self, source, off, duration, depends=None):
+        self.source = source
+        self.off = off
+        self.duration = duration
+        self.depends = depends
+
+
 class MinionOnBaseState(OnBaseState):
+    """ The power of the minion is raw_power plus its modifiers, computed on first
+        read and cached until the stack changes or invalidate is called. """
+    __slots__ = ('raw_power', 'actions', 'modifiers', '_power')
+
     def __init__(self, owner, base, power):
         super().__init__(owner, base)
         self.raw_power = power
-        self.actions = []
+        self.actions = Zone()
+        self.modifiers = []
+        self._power = None
 
     @property
     def power(self):
-        if self.raw_power <= 0:
-            return 0
-        return self.raw_power
+        if self._power is None:
+            power = self.raw_power
+            for modifier in self.modifiers:
+                power += modifier.off(self) if callable(modifier.off) else modifier.off
+            self._power = power if power > 0 else 0
+        return self._power
+
+    def invalidate(self):
+        self._power = None
+
+    def set_cached_power(self, power):
+        """ For a state rebuilt with its modifiers, whose power is known. """
+        self._power = power
+
+    def add_modifier(self, modifier):
+        self.modifiers.append(modifier)
+        self._power = None
+
+    def remove_modifiers(self, duration, source=None):
+        """ Removes the modifiers lasting for duration, only those of source if given. """
+        modifiers = [m for m in self.modifiers
+                     if m.duration != duration or (source is not None and m.source is not source)]
+        if len(modifiers) != len(self.modifiers):
+            self.modifiers = modifiers
+            self._power = None
+
+    def has_dependency(self, depends):
+        for modifier in self.modifiers:
+            if modifier.depends == depends:
+                return True
+        return False
 
 
 class ActionOnBaseState(OnBaseState):
+    __slots__ = ()
+
     def __init__(self, owner, base):
         super().__init__(owner, base)
 
 
 class ActionOnMinionState(OnMinionState):
+    __slots__ = ()
+
     def __init__(self, owner, minion):
         super().__init__(owner, minion)
 
 
+class ActionOnFieldState(InPlayState):
+    """ A played action that is not attached to a base or minion. """
+    __slots__ = ()
+
+    def __init__(self, owner):
+        super().__init__(owner)
+
+
 class InHandState(CardState):
-    pass
+    __slots__ = ()
+    zone = intents.ZONE_HAND
 
 
 class InDeckState(CardState):
-    pass
+    __slots__ = ()
+    zone = intents.ZONE_DECK
 
 
 class InDiscardState(CardState):
-    pass
+    __slots__ = ()
+    zone = intents.ZONE_DISCARD
 
 
 class BaseInPlayState(CardState):
+    """ power and player_power, the total per player, are kept up to date by the rules
+        as minions come, go and change power. """
+    __slots__ = ('actions', 'minions', 'power_threshold', 'power', 'player_power')
+    zone = intents.ZONE_PLAY
+
     def __init__(self, power_threshold):
         super().__init__()
-        self.actions = []
-        self.minions = []
+        self.actions = Zone()
+        self.minions = Zone()
         self.power_threshold = power_threshold
+        self.power = 0
+        self.player_power = {}
 
-    @property
-    def power(self):
-        return sum([m.power for m in self.minions])
+    def add_power(self, player, power):
+        self.power += power
+        self.player_power[player] = self.player_power.get(player, 0) + power
+
+    def is_breaking(self):
+        return self.power >= self.power_threshold
+
+    def get_ranking(self):
+        """ (rank, players) for the players with power here, highest first. Tied players
+            share a rank and the ranks after them are skipped. """
+        powers = sorted(set([p for p in self.player_power.values() if p > 0]), reverse=True)
+        ranking = []
+        rank = 0
+        for power in powers:
+            players = [p for p in self.player_power if self.player_power[p] == power]
+            ranking.append((rank, players))
+            rank += len(players)
+        return ranking
 
 
 class BaseInDeckState(CardState):
+    __slots__ = ()
+    zone = intents.ZONE_DECK
+
     def __init__(self):
         super().__init__()
 
 
 class BaseInDiscardState(CardState):
+    __slots__ = ()
+    zone = intents.ZONE_DISCARD
+
     def __init__(self):
         super().__init__()
 
 
 class Card(intents.IntentConsumer):
-    def __init__(self, id, game, name, text):
+    """ A card in a game. What every card of a class shares, its name, text, power
+        and so on, are class attributes; an instance only holds its id, owner and
+        state. Card classes declare __slots__, so instances have no __dict__. """
+    __slots__ = ('id', '_state')
+    name = None
+    text = None
+
+    def __init__(self, id):
         self.id = id
-        self.game = game
-        self.name = name
-        self.text = text
-        self.state = None
+        self._state = None
 
-    def get_intent_list(self):
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        """ Subscriptions follow the card's zone, and in play whatever its state
+            narrows them to, so the game's router is refreshed on the way. """
+        zone = self.get_zone()
+        self._state = state
+        if self.game is not None and (zone == intents.ZONE_PLAY or self.get_zone() != zone):
+            self.game.intent_router.refresh(self)
+
+    def get_zone(self):
+        return self._state.zone if self._state is not None else None
+
+    def get_subscriptions(self):
         return []
 
-    def get_intent_handlers(self, intent):
-        return {}
+    def get_memo(self):
+        """ What the card remembers beyond its state, for snapshots; None if nothing.
+            Cards are referred to by id. """
+        return None
+
+    def set_memo(self, memo):
+        """ Restores what get_memo returned, None included. """
+        pass
 
 
 class BaseCard(Card):
-    def __init__(self, id, game, name, text, power_threshold, award_points):
-        super().__init__(id, game, name, text)
-        self.power_threshold = power_threshold
-        self.award_points = award_points
+    __slots__ = ('game',)
+    power_threshold = None
+    award_points = ()
+
+    def __init__(self, id, game):
+        super().__init__(id)
+        self.game = game
 
 
 class MinionCard(Card):
-    def __init__(self, id, player, name, text, power):
-        super().__init__(id, player.game, name, text)
+    __slots__ = ('player',)
+    base_power = None
+
+    def __init__(self, id, player):
+        super().__init__(id)
         self.player = player
-        self.base_power = power
+
+    @property
+    def game(self):
+        return self.player.game
+
+    def get_modifiers(self):
+        """ The modifiers the minion itself has while in play. """
+        return []
 
 
 class ActionCard(Card):
@@ -116,10 +267,18 @@ class ActionCard(Card):
     TARGET_ACTION = 40
     TARGET_FIELD = 50
 
-    def __init__(self, id, player, name, text, targets):
-        super().__init__(id, player.game, name, text)
+    __slots__ = ('player',)
+    targets = ()
+    # ongoing actions played on the field stay there after resolving, until they remove themselves
+    ongoing = False
+
+    def __init__(self, id, player):
+        super().__init__(id)
         self.player = player
-        self.targets = targets
+
+    @property
+    def game(self):
+        return self.player.game
 
 
 class Deck:
@@ -129,16 +288,3 @@ class Deck:
         self.minions = minions
         self.actions = actions
 
-    def create_cards(self, player, produce_id):
-        cards = []
-        for card_class in self.minions+self.actions:
-            card = card_class(produce_id(card_class), player)
-            cards.append(card)
-        return cards
-
-    def create_bases(self, game, produce_id):
-        bases = []
-        for base_class in self.bases:
-            base = base_class(produce_id(base_class), game)
-            bases.append(base)
-        return bases
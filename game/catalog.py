@@ -0,0 +1,79 @@
+import hashlib
+import json
+import threading
+import cards
+
+
+class CardCatalog:
+    """ The static definitions of the cards of a deck. Catalogs are identified by
+        a hash of their content so clients can cache them across games. """
+    def __init__(self, deck_name, definitions):
+        self.deck_name = deck_name
+        self.definitions = definitions
+        content = json.dumps({'deck': deck_name, 'cards': definitions}, sort_keys=True)
+        self.hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+_catalog_lock = threading.Lock()
+_catalogs_by_deck_class = {}
+_catalogs_by_hash = {}
+_definitions_by_card_class = {}
+
+
+def load_deck(deck):
+    _catalog_lock.acquire()
+    try:
+        if deck.__class__ in _catalogs_by_deck_class:
+            return _catalogs_by_deck_class[deck.__class__]
+
+        card_classes = deck.minions + deck.actions + deck.bases
+        definitions = [_create_definition(card_class) for card_class in card_classes]
+        catalog = CardCatalog(deck.name, definitions)
+        _catalogs_by_deck_class[deck.__class__] = catalog
+        _catalogs_by_hash[catalog.hash] = catalog
+        for idx, card_class in enumerate(card_classes):
+            if card_class not in _definitions_by_card_class:
+                _definitions_by_card_class[card_class] = (catalog, idx)
+        return catalog
+    finally:
+        _catalog_lock.release()
+
+
+def get_catalog(catalog_hash):
+    """ The catalog with the hash, None if there is none or catalog_hash is not a str. """
+    if not isinstance(catalog_hash, str):
+        return None
+    _catalog_lock.acquire()
+    try:
+        return _catalogs_by_hash.get(catalog_hash)
+    finally:
+        _catalog_lock.release()
+
+
+def get_definition(card_class):
+    """ Returns the catalog defining the card class and the index of its definition. """
+    _catalog_lock.acquire()
+    try:
+        return _definitions_by_card_class[card_class]
+    finally:
+        _catalog_lock.release()
+
+
+def _create_definition(card_class):
+    definition = {'name': card_class.name, 'text': card_class.text}
+    if issubclass(card_class, cards.MinionCard):
+        definition['type'] = 'minion'
+        definition['power'] = card_class.base_power
+    elif issubclass(card_class, cards.ActionCard):
+        definition['type'] = 'action'
+    elif issubclass(card_class, cards.BaseCard):
+        definition['type'] = 'base'
+        definition['power_threshold'] = card_class.power_threshold
+        definition['award_points'] = {
+            'first': card_class.award_points[0],
+            'second': card_class.award_points[1],
+            'third': card_class.award_points[2]
+        }
+    else:
+        raise ValueError('Unknown card type')
+    return definition
@@ -1,5 +1,6 @@
 # DINOSAURS
-from cards import Deck, BaseCard, MinionCard, ActionCard
+from cards import Deck, BaseCard, MinionCard, ActionCard, Modifier
+from intents import Subscription
 import cards
 import intents
 
@@ -14,278 +15,278 @@ class DinosaursDeck(Deck):
 
 
 class JungleOasis(BaseCard):
-    def __init__(self, id, game):
-        super().__init__(id, game, 'Jungle Oasis', '', 12, [2, 0, 0])
+    __slots__ = ()
+    name = 'Jungle Oasis'
+    text = ''
+    power_threshold = 12
+    award_points = (2, 0, 0)
 
 
 class TarPits(BaseCard):
-    def __init__(self, id, game):
-        super().__init__(id, game, 'Tar Pits', 'After each time a minion is destroyed here,'
-                                               'place it at the bottom of its owner\'s deck.',
-                         16, [4, 3, 2])
-        self._minion_tracker = []
-
-    def handle_intent(self, intent, priority):
-        if not isinstance(self.state, cards.BaseInPlayState):
-            return
-        if (priority == intents.PRIORITY_PRE_RESOLVE and
-                isinstance(intent, intents.DestroyMinion) and
-                self == intent.minion.state.base):
-            self._minion_tracker.append(intent.minion)
-        if (priority == intents.PRIORITY_POST_RESOLVE and
-                isinstance(intent, intents.DestroyMinion) and
-                intent.minion in self._minion_tracker):
-            self._minion_tracker.remove(intent.minion)
-            self.game.perform_intent(intents.PlaceMinionOnDeckBottom(intent.minion))
+    __slots__ = ()
+    name = 'Tar Pits'
+    text = ('After each time a minion is destroyed here,'
+            'place it at the bottom of its owner\'s deck.')
+    power_threshold = 16
+    award_points = (4, 3, 2)
+
+    def get_subscriptions(self):
+        return [Subscription(intents.DestroyMinion, intents.PRIORITY_POST_RESOLVE, self._after_destroy, base=self)]
+
+    async def _after_destroy(self, intent):
+        await self.game.perform_intent(intents.PlaceMinionOnDeckBottom(intent.minion))
 
 
 class Laseratops(MinionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Laseratops', 'Destroy a minion of power 2 or less on this base.', 4)
-
-    def handle_intent(self, intent, priority):
-        if not isinstance(self.state, cards.MinionOnBaseState):
-            return
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveMinionAbility) and
-                self == intent.minion):
-            targets = [m for m in self.state.base.minions if m.power <= 2]
-            if len(targets) > 0:
-                target = self.game.request_selection(self.player, targets)
-                self.game.perform_intent(intents.DestroyMinion(target))
+    __slots__ = ()
+    name = 'Laseratops'
+    text = 'Destroy a minion of power 2 or less on this base.'
+    base_power = 4
+
+    def get_subscriptions(self):
+        return [Subscription(intents.ResolveMinionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self)]
+
+    async def _resolve(self, intent):
+        targets = self.game.board.get_minions_up_to(self.state.base, 2)
+        if len(targets) > 0:
+            target = await self.game.request_selection(self.player, 'Choose a minion to destroy.', targets)
+            await self.game.perform_intent(intents.DestroyMinion(target))
 
 
 class WildlifePreserve(ActionCard):
-    def __init__(self, id, game):
-        super().__init__(id, game, 'Wildlife Preserve',
-                         'Play on a base. Ongoing: Your minions here '
-                         'are not affected by other players\' actions.',
-                         [BaseCard])
+    __slots__ = ()
+    name = 'Wildlife Preserve'
+    text = ('Play on a base. Ongoing: Your minions here '
+            'are not affected by other players\' actions.')
+    targets = (BaseCard,)
 
-    def handle_intent(self, intent, priority):
+    def get_subscriptions(self):
         if not isinstance(self.state, cards.ActionOnBaseState):
-            return
-        if priority == intent.PRIORITY_CANCEL:
-            if (isinstance(intent, intents.AffectMinion) and
-                    self.state.owner == intent.minion.state.owner and
-                    self.state.base == intent.minion.state.base):
-                intent.cancel()
+            return []
+        return [Subscription(intents.AffectMinion, intents.PRIORITY_CANCEL, self._protect, base=self.state.base)]
+
+    async def _protect(self, intent):
+        if self.state.owner == intent.minion.state.owner:
+            intent.cancel()
 
 
 class WarRaptor(MinionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'War Raptor', 'Ongoing: Gains +1 power for each War Raptor '
-                                     'on this base (including this one).', 2)
-
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveMinionAbility) and
-                self == intent.minion):
-            for m in self.state.base.minions:
-                if isinstance(m, WarRaptor):
-                    self.game.perform_intent(intents.ModifyMinionPower(self, off=1))
-                    if self != m:
-                        self.game.perform_intent(intents.ModifyMinionPower(m, off=1))
-        if (priority == intents.PRIORITY_MODIFY and
-                isinstance(intent, intents.DestroyMinion) and
-                self == intent.minion):
-            for m in self.state.base.minions:
-                if isinstance(m, WarRaptor):
-                    self.game.perform_intent(intents.ModifyMinionPower(self, off=-1))
-                    if self != m:
-                        self.game.perform_intent(intents.ModifyMinionPower(m, off=-1))
+    __slots__ = ()
+    name = 'War Raptor'
+    text = ('Ongoing: Gains +1 power for each War Raptor '
+            'on this base (including this one).')
+    base_power = 2
+
+    def get_modifiers(self):
+        return [Modifier(self, self._bonus, cards.WHILE_IN_PLAY, cards.DEPENDS_BASE)]
+
+    def _bonus(self, state):
+        return self.game.board.count(state.base, WarRaptor)
 
 
 class ToothAndClawAndGuns(ActionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Tooth and Claw... and Guns',
-                         'Play on a minion. Ongoing: If an ability would affect this minion,'
-                         ' destroy this card and the ability does not affect this minion.',
-                         [MinionCard])
+    __slots__ = ()
+    name = 'Tooth and Claw... and Guns'
+    text = ('Play on a minion. Ongoing: If an ability would affect this minion,'
+            ' destroy this card and the ability does not affect this minion.')
+    targets = (MinionCard,)
+
+    def get_subscriptions(self):
+        if not isinstance(self.state, cards.ActionOnMinionState):
+            return []
+        return [Subscription(intents.AffectMinion, intents.PRIORITY_CANCEL_AND_MODIFY, self._protect,
+                             card=self.state.minion)]
 
-    def handle_intent(self, intent, priority):
-        if priority == intents.PRIORITY_CANCEL_AND_MODIFY and isinstance(self.state, cards.ActionOnMinionState):
-            if isinstance(intent, intents.AffectMinion) and self.state.minion == intent.minion:
-                intent.cancel()
-                self.game.perform_intent(intents.DestroyAction(self))
+    async def _protect(self, intent):
+        intent.cancel()
+        await self.game.perform_intent(intents.DestroyAction(self))
 
 
 class NaturalSelection(ActionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Natural Selection',
-                         'Choose one of your minions on a base. Destroy a '
-                         'minion there with less power than yours.', [])
-
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveActionAbility) and
-                self == intent.action):
-            targets = [m for b in self.game.bases for m in b.minions if self.state.owner == m.state.owner]
+    __slots__ = ()
+    name = 'Natural Selection'
+    text = ('Choose one of your minions on a base. Destroy a '
+            'minion there with less power than yours.')
+    targets = ()
+
+    def get_subscriptions(self):
+        return [Subscription(intents.ResolveActionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self)]
+
+    async def _resolve(self, intent):
+        targets = self.game.board.get_minions(owner=self.state.owner)
+        if len(targets) > 0:
+            target = await self.game.request_selection(self.state.owner, 'Choose one of your minions.', targets)
+            targets = self.game.board.get_minions_up_to(target.state.base, target.state.power - 1)
             if len(targets) > 0:
-                target = self.game.request_selection(self.state.owner, targets)
-                targets = [m for m in target.state.base.minions if m.state.power < target.state.power]
-                if len(targets) > 0:
-                    target = self.game.request_selection(self.state.owner, targets)
-                    self.game.perform_intent(intents.DestroyMinion(target))
+                target = await self.game.request_selection(self.state.owner, 'Choose a minion to destroy.', targets)
+                await self.game.perform_intent(intents.DestroyMinion(target))
 
 
 class ArmorStego(MinionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Armor Stego', 'Ongoing: Has +2 power during other players\' turns.', 3)
+    __slots__ = ()
+    name = 'Armor Stego'
+    text = 'Ongoing: Has +2 power during other players\' turns.'
+    base_power = 3
+
+    def get_modifiers(self):
+        return [Modifier(self, self._bonus, cards.WHILE_IN_PLAY, cards.DEPENDS_TURN)]
 
-    def handle_intent(self, intent, priority):
-        if priority == intents.PRIORITY_PRE_RESOLVE and isinstance(self.state, cards.InPlayState):
-            if isinstance(intent, intents.StartTurn) and self.state.owner == intent.player:
-                self.game.perform_intent(intents.ModifyMinionPower(self, off=2))
-            elif isinstance(intent, intents.EndTurn) and self.state.owner == intent.player:
-                self.game.perform_intent(intents.ModifyMinionPower(self, off=-2))
-            elif isinstance(intent, intents.ChangeCardOwner) and self == intent.card:
-                if self.state.owner == self.game.active_player and intent.new_owner != self.game.active_player:
-                    self.game.perform_intent(intents.ModifyMinionPower(self, off=-2))
-                elif self.state.owner != self.game.active_player and intent.new_owner == self.game.active_player:
-                    self.game.perform_intent(intents.ModifyMinionPower(self, off=2))
+    def _bonus(self, state):
+        return 2 if self.game.active_player != state.owner else 0
 
 
 class Howl(ActionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Howl', 'Each of your minions gains +1 power until the end of your turn.', [])
-
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveActionAbility) and
-                self == intent.action):
-            for b in self.game.bases:
-                for m in b.minions:
-                    if m.state.owner == self.player:
-                        self.game.perform_intent(intents.ModifyMinionPower(m, off=1))
-        elif priority == intents.PRIORITY_MODIFY and isinstance(self.state, cards.InPlayState):
-            if isinstance(intent, intents.EndTurn) and self.player == intent.player:
-                for b in self.game.bases:
-                    for m in b.minions:
-                        if m.state.owner == self.player:
-                            self.game.perform_intent(intents.ModifyMinionPower(m, off=-1))
-                self.game.perform_intent(intents.DestroyAction(self))
-            elif isinstance(intent, intents.MinionPlayed) and self.player == intent.minion.state.owner:
-                self.game.perform_intent(intents.ModifyMinionPower(intent.minion, off=1))
+    __slots__ = ()
+    ongoing = True
+    name = 'Howl'
+    text = 'Each of your minions gains +1 power until the end of your turn.'
+    targets = ()
+
+    def get_subscriptions(self):
+        return [Subscription(intents.ResolveActionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self),
+                Subscription(intents.EndTurn, intents.PRIORITY_MODIFY, self._end_turn, player=self.player),
+                Subscription(intents.PlayMinion, intents.PRIORITY_POST_RESOLVE, self._minion_played,
+                             player=self.player)]
+
+    async def _resolve(self, intent):
+        await self.game.perform_intents([intents.ModifyMinionPower(m, 1, self, cards.UNTIL_END_OF_TURN)
+                                         for m in self.game.board.get_minions(owner=self.player)])
+
+    async def _end_turn(self, intent):
+        await self.game.perform_intent(intents.DestroyAction(self))
+
+    async def _minion_played(self, intent):
+        await self.game.perform_intent(intents.ModifyMinionPower(intent.minion, 1, self, cards.UNTIL_END_OF_TURN))
 
 
 class KingRex(MinionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'King Rex', '', 7)
+    __slots__ = ()
+    name = 'King Rex'
+    text = ''
+    base_power = 7
 
 
 class Rampage(ActionCard):
+    __slots__ = ('_target_base', '_target_power')
+    ongoing = True
+    name = 'Rampage'
+    text = ('Reduce the breakpoint of a base by the power of one '
+            'of your minions on that base until the end of the turn.')
+    targets = ()
+
     def __init__(self, id, player):
-        super().__init__(id, player, 'Rampage',
-                         'Reduce the breakpoint of a base by the power of one '
-                         'of your minions on that base until the end of the turn.', [])
-
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_CANCEL and
-                isinstance(intent, intents.PlayAction) and
-                self == intent.action):
-            targets = [b for b in self.game.bases if sum([1 for m in b.minions if m.state.owner == self.player]) > 0]
-            if len(targets) == 0:
-                intent.cancel()
-        elif (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveActionAbility) and
-                self == intent.action):
-            targets = [m for b in self.game.bases for m in b.minions]
-            if len(targets) > 0:
-                target = self.game.request_selection(self.player, targets)
-                self.state._rampage_target_power = target.state.power
-                self.state._rampage_target_base = target.state.base
-                self.game.perform_intent(intents.ModifyBasePowerThreshold(target.state.base, off=-target.state.power))
-        elif (priority == intents.PRIORITY_MODIFY and
-                isinstance(self.state, cards.InPlayState) and
-                isinstance(intent, intents.EndTurn) and
-                self.player == intent.player):
-            if (hasattr(self.state, '_rampage_target_power') and
-                    isinstance(self.state._rampage_target_base.state, cards.InPlayState)):
-                self.game.perform_intent(intents.ModifyBasePowerThreshold(
-                    self.state._rampage_target_base, off=self.state._rampage_target_power))
-
-            del self.state._rampage_target_power
-            del self.state._rampage_target_base
-            self.game.perform_intent(intents.DestroyAction(self))
+        super().__init__(id, player)
+        self._target_base = None
+        self._target_power = 0
+
+    def get_subscriptions(self):
+        return [Subscription(intents.PlayAction, intents.PRIORITY_CANCEL, self._play, card=self,
+                             zones=(intents.ZONE_HAND,)),
+                Subscription(intents.ResolveActionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self),
+                Subscription(intents.EndTurn, intents.PRIORITY_MODIFY, self._end_turn, player=self.player)]
+
+    def get_memo(self):
+        return (self._target_base.id, self._target_power) if self._target_base is not None else None
+
+    def set_memo(self, memo):
+        self._target_base = self.game.zones.get_card(memo[0]) if memo is not None else None
+        self._target_power = memo[1] if memo is not None else 0
+
+    async def _play(self, intent):
+        if len(self.game.board.get_bases(self.player)) == 0:
+            intent.cancel()
+
+    async def _resolve(self, intent):
+        targets = self.game.board.get_minions(owner=self.player)
+        if len(targets) > 0:
+            target = await self.game.request_selection(self.player, 'Choose one of your minions.', targets)
+            self._target_base = target.state.base
+            self._target_power = target.state.power
+            await self.game.perform_intent(intents.ModifyBasePowerThreshold(target.state.base,
+                                                                            off=-target.state.power))
+
+    async def _end_turn(self, intent):
+        if self._target_base is not None and isinstance(self._target_base.state, cards.BaseInPlayState):
+            await self.game.perform_intent(intents.ModifyBasePowerThreshold(self._target_base,
+                                                                            off=self._target_power))
+        self._target_base = None
+        await self.game.perform_intent(intents.DestroyAction(self))
 
 
 class Upgrade(ActionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Upgrade', 'Play on a minion. Ongoing: This minion has +2 power.', [MinionCard])
+    __slots__ = ()
+    name = 'Upgrade'
+    text = 'Play on a minion. Ongoing: This minion has +2 power.'
+    targets = (MinionCard,)
+
+    def get_subscriptions(self):
+        return [Subscription(intents.ResolveActionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self)]
 
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveActionAbility) and
-                self == intent.action):
-            self.game.perform_intent(intents.ModifyMinionPower(self.state.minion, off=2))
-        elif (priority == intents.PRIORITY_PRE_RESOLVE and
-                isinstance(intent, intents.DestroyAction) and
-                self == intent.action):
-            self.game.perform_intent(intents.ModifyMinionPower(self.state.minion, off=-2))
+    async def _resolve(self, intent):
+        await self.game.perform_intent(intents.ModifyMinionPower(self.state.minion, 2, self, cards.WHILE_ATTACHED))
 
 
 class SurvivalOfTheFittest(ActionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Survival of the Fittest',
-                         'Destroy the lowest-power minion (you choose in case of a tie)'
-                         ' on each base with a higher-power minion.', [])
-
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveActionAbility) and
-                self == intent.action):
-            for base in self.game.bases:
-                targets = []
-                for m in base.minions:
-                    if len(targets) == 0 or m.state.power < targets[0].state.power:
-                        targets = [m]
-                    if len(targets) != 0 and m.state.power == targets[0].state.power:
-                        targets.append(m)
-                if 0 < len(targets) < len(base.minions):
-                    if len(targets) > 1:
-                        target = self.game.request_selection(self.player, targets)
-                    else:
-                        target = targets[0]
-                    self.game.perform_intent(intents.DestroyMinion(target))
+    __slots__ = ()
+    name = 'Survival of the Fittest'
+    text = ('Destroy the lowest-power minion (you choose in case of a tie)'
+            ' on each base with a higher-power minion.')
+    targets = ()
+
+    def get_subscriptions(self):
+        return [Subscription(intents.ResolveActionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self)]
+
+    async def _resolve(self, intent):
+        destroyed = []
+        for base in self.game.bases:
+            targets = self.game.board.get_weakest(base)
+            if 0 < len(targets) < len(base.state.minions):
+                if len(targets) > 1:
+                    target = await self.game.request_selection(self.player, 'Choose a minion to destroy.', targets)
+                else:
+                    target = targets[0]
+                destroyed.append(intents.DestroyMinion(target))
+        await self.game.perform_intents(destroyed)
 
 
 class Augmentation(ActionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Augmentation', 'One minion gains +4 power until the end of your turn.', [])
-
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveActionAbility) and
-                self == intent.action):
-            targets = [m for b in self.game.bases for m in b.minions]
-            target = self.game.request_selection(self.player, targets)
-            self.state._target = target
-            self.game.perform_intent(intents.ModifyMinionPower(target, off=4))
-        elif (priority == intents.PRIORITY_PRE_RESOLVE and isinstance(intent, intents.DestroyAction) and
-                self == intent.action):
-            self.game.perform_intent(intents.ModifyMinionPower(self.state._target, off=-4))
-        elif isinstance(intent, intents.EndTurn) and self.state.owner == intent.player:
-            self.game.perform_intent(intents.DestroyAction(self))
+    __slots__ = ()
+    name = 'Augmentation'
+    text = 'One minion gains +4 power until the end of your turn.'
+    targets = ()
 
+    def get_subscriptions(self):
+        return [Subscription(intents.ResolveActionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self)]
+
+    async def _resolve(self, intent):
+        targets = self.game.board.get_minions()
+        if len(targets) > 0:
+            target = await self.game.request_selection(self.player, 'Choose a minion.', targets)
+            await self.game.perform_intent(intents.ModifyMinionPower(target, 4, self, cards.UNTIL_END_OF_TURN))
 
-class TenatiousZ(MinionCard):
-    def __init__(self, id, player):
-        super().__init__(id, player, 'Tenatious Z', 'Special: blag', 2)
 
-    def handle_intent(self, intent, priority):
-        if (priority == intents.PRIORITY_CANCEL and
-                isinstance(intent, intents.PlayMinion) and
-                self == intent.minion and
-                hasattr(self.game.turn_state, 'tenatiousz_used')):
+class TenatiousZ(MinionCard):
+    __slots__ = ()
+    name = 'Tenatious Z'
+    text = 'Special: blag'
+    base_power = 2
+
+    def get_subscriptions(self):
+        return [Subscription(intents.PlayMinion, intents.PRIORITY_CANCEL, self._play, card=self,
+                             zones=(intents.ZONE_HAND, intents.ZONE_DISCARD)),
+                Subscription(intents.ResolveMinionAbility, intents.PRIORITY_RESOLVE, self._resolve, card=self,
+                             zones=(intents.ZONE_DISCARD,)),
+                Subscription(intents.EndTurn, intents.PRIORITY_MODIFY, self._end_turn, player=self.player,
+                             zones=None)]
+
+    async def _play(self, intent):
+        if hasattr(self.game.turn_state, 'tenatiousz_used'):
             intent.cancel()
-        elif (priority == intents.PRIORITY_RESOLVE and
-                isinstance(intent, intents.ResolveMinionAbility) and
-                self == intent.minion and
-                isinstance(intent, cards.InDiscardState)):
-            self.game.turn_state.tenatiousz_used = True
-            self.game.turn_state.minions += 1
-        elif (priority == intents.PRIORITY_MODIFY and
-                isinstance(intent, intents.EndTurn) and
-                self.player == intent.player):
+
+    async def _resolve(self, intent):
+        self.game.turn_state.tenatiousz_used = True
+        self.game.turn_state.minions_left += 1
+
+    async def _end_turn(self, intent):
+        if hasattr(self.game.turn_state, 'tenatiousz_used'):
             del self.game.turn_state.tenatiousz_used
@@ -1,20 +1,48 @@
+import asyncio
+import random
 import threading
+import traceback
+from collections import deque
 from pile import Pile
 from intents import IntentRouter
-from queue import Queue, Empty
+import intents
 import packets
 import packets.game
+import packets.server
 import cards
-from util import CountDownLatch
+import catalog
+import templates
+import timers
+from rules import Rules
+from board import Board
+from zones import Zone, ZoneRegistry
+import zobrist
+from zobrist import ZobristHash, TranspositionTable
 from player import Player, LocalPlayer
 
 
+def first_option(options):
+    return options[0]
+
+
+def _get_id(card):
+    return card.id
+
+
 class GameConfig:
-    def __init__(self, users, decks, point_max=15):
+    """ selection_timeout: seconds a player has to answer a selection, None to wait forever
+        selection_default: options -> option chosen when a selection times out, None to
+                           raise SelectionTimeoutException in the game instead
+        seed:              seed of the game's random stream, None for a random one """
+    def __init__(self, users, decks, point_max=15, selection_timeout=None, selection_default=first_option,
+                 seed=None):
         super().__init__()
         self.users = users
         self.decks = decks
         self.point_max = point_max
+        self.selection_timeout = selection_timeout
+        self.selection_default = selection_default
+        self.seed = seed
 
 
 class Game:
@@ -24,15 +52,21 @@ class Game:
         self.users = config.users
         self.decks = config.decks
         self.point_max = config.point_max
+        self.selection_timeout = config.selection_timeout
+        self.selection_default = config.selection_default
+        self.random = random.Random(config.seed)
         self.turn_state = None
 
     def start(self):
         pass
 
-    def request_selection(self, player, text, options):
+    async def request_selection(self, player, text, options, timeout=None, default=None):
         raise NotImplementedError
 
-    def request_selections(self, selections):
+    async def request_selections(self, selections):
+        raise NotImplementedError
+
+    def cancel_selection(self, request_id):
         raise NotImplementedError
 
     def get_player(self, user):
@@ -42,8 +76,14 @@ class Game:
         raise NotImplementedError
 
 
-class LocalGame(Game, threading.Thread):
-    def __init__(self, id, config):
+class LocalGame(Game):
+    """ Game logic runs as a coroutine. Without a loop the game gets a thread and an
+        event loop of its own; given a loop, e.g. the websocket server's, it runs there
+        alongside any number of other games. """
+
+    MOVE_TABLE_SIZE = 1024
+
+    def __init__(self, id, config, loop=None):
         super().__init__(id, config)
 
         self.players = []
@@ -54,96 +94,156 @@ class LocalGame(Game, threading.Thread):
             self._players_by_user[user] = player
 
         self.bases = []
-        self.base_deck = Pile()
-        self.base_discard = Pile()
-        self.actions = []
+        self.base_deck = Pile(self.random)
+        self.base_discard = Pile(self.random)
+        self.actions = Zone()
+        self.zobrist = ZobristHash(self)
+        self.zones = ZoneRegistry(self.zobrist.card_moved)
         self.intent_router = IntentRouter()
+        self.board = Board()
+        self.rules = Rules(self)
+        self.intent_router.register(self.rules)
 
         self._card_id_counter = 0
-        self._cards_by_id = {}
+        self.move_table = TranspositionTable(self.MOVE_TABLE_SIZE)
 
-        self._packet_queue = Queue()
+        self._own_loop = loop is None
+        self._loop = self._create_loop() if loop is None else loop
+        self._thread = None
+        self._packets = deque()
+        self._packet_waiter = None
+        self._serializer = packets.game.PROTOCOL.serializer
+        self._catalog_frames = {}
+        self._catalog_frames_lock = threading.Lock()
 
         self._request_id_counter = 0
-        self._request_options = {}
-        self._replies = {}
-        self._reply_latch = CountDownLatch(0)
-
-    def start(self):
-        threading.Thread.start(self)
-
-    def run(self):
-        print('[Game'+str(self.id)+'] Starting...')
-        self._distribute_decks()
-
-        self.bases = [self.base_deck.remove_top() for i in range(len(self.players)+1)]
-        for base in self.bases:
-            base.state = cards.BaseInPlayState(base.power_threshold)
-        for base in self.base_deck:
-            base.state = cards.BaseInDeckState()
-
-        for player in self.players:
-            for card in player.deck:
-                card.state = cards.InDeckState()
-
-        for player in self.players:
-            for i in range(5):
-                self.draw_card(player)
-
-        self._send_cards()
+        self._selections = {}
+        self._timer_wheel = timers.default_wheel()
 
-        while not self.is_won():
-            self._take_turn()
+    def _create_loop(self):
+        return asyncio.new_event_loop()
 
+    def start(self):
+        if self._own_loop:
+            self._thread = threading.Thread(target=self._run_thread, name='Game'+str(self.id))
+            self._thread.start()
+        else:
+            future = asyncio.run_coroutine_threadsafe(self.run(), self._loop)
+            future.add_done_callback(self._game_done)
+
+    def _game_done(self, future):
+        """ A game on a shared loop has no thread to print its traceback. """
+        if not future.cancelled() and future.exception() is not None:
+            exception = future.exception()
+            self._log('Crashed:\n' + ''.join(traceback.format_exception(type(exception), exception,
+                                                                         exception.__traceback__)))
+
+    def _run_thread(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.run())
+        finally:
+            self._loop.close()
+
+    async def run(self):
+        self._log('Starting...')
+        try:
+            await self._distribute_decks()
+            self._deal()
+            self._send_cards()
+
+            while not self.is_won():
+                await self._take_turn()
+            self._end_game()
+        finally:
+            # deadlines outliving the game would call into its closed loop
+            self._cancel_timers()
+
+    def _cancel_timers(self):
+        for selection in self._selections.values():
+            if selection.timer is not None:
+                selection.timer.cancel()
+
+    def _end_game(self):
         winner = self.get_winner()
-        for player in self.players:
-            player.send_packet(packets.game.EndGamePacket(winner.user.name))
+        self.broadcast_packet(packets.game.EndGamePacket(winner.user.name))
 
-    def _distribute_decks(self):
-        print('[Game'+str(self.id)+'] Selecting decks...')
+    def _log(self, message):
+        print('[Game'+str(self.id)+'] '+message)
+
+    async def _distribute_decks(self):
+        self._log('Selecting decks...')
         remaining_decks = self.decks
         for player in self.players+list(reversed(self.players)):
-            deck = self._choose_deck(player, remaining_decks)
+            deck = await self._choose_deck(player, remaining_decks)
             player.decks.append(deck)
             remaining_decks.remove(deck)
+        self._create_cards()
 
-            for card in deck.create_cards(player, self._next_card_id):
-                self._cards_by_id[card.id] = card
-                player.deck.add_top(card)
+    def _create_cards(self):
+        """ Creates the cards and bases of the decks the players chose from the decks'
+            templates, shuffled into their decks and the base deck. The cards of a deck
+            get a range of ids and are registered with the router once in their
+            starting states. """
+        for player in self.players:
+            for deck in player.decks:
+                template = templates.compile_deck(deck)
+                self._add_cards(template.create_cards(player, self._next_card_ids(len(template.card_classes))),
+                                player.deck, template.card_state)
+            self.zones.shuffle(player.deck)
 
         for player in self.players:
-            player.deck.shuffle()
             for deck in player.decks:
-                for base in deck.create_bases(self, self._next_card_id):
-                    self._cards_by_id[base.id] = base
-                    self.base_deck.add_top(base)
+                template = templates.compile_deck(deck)
+                self._add_cards(template.create_bases(self, self._next_card_ids(len(template.base_classes))),
+                                self.base_deck, template.base_state)
 
-        self.base_deck.shuffle()
+        self.zones.shuffle(self.base_deck)
 
-    def _choose_deck(self, player, remaining_decks):
-        print('[Game'+str(self.id)+'] Player ' + player.user.name + ' selecting...')
-        return self.request_selection(player, 'Choose a deck.', remaining_decks)
+    def _add_cards(self, created, zone, state):
+        self.zones.add_all(created, zone, state)
+        for card in created:
+            self.intent_router.register(card)
 
-    def _next_card_id(self, card_class):
-        card_id = self._card_id_counter
-        self._card_id_counter += 1
-        return card_id
+    def _deal(self):
+        """ Lays out the first bases and deals the opening hands. """
+        for i in range(len(self.players)+1):
+            base = self.base_deck.get_top()
+            self.zones.move(base, None, cards.BaseInPlayState(base.power_threshold))
+            self.bases.append(base)
+
+        for player in self.players:
+            self.draw_cards(player, 5)
+
+    async def _choose_deck(self, player, remaining_decks):
+        self._log('Player ' + player.user.name + ' selecting...')
+        return await self.request_selection(player, 'Choose a deck.', remaining_decks)
+
+    def _next_card_ids(self, count):
+        """ Reserves count contiguous ids; returns the first. """
+        first_id = self._card_id_counter
+        self._card_id_counter += count
+        return first_id
 
     def is_won(self):
         return self.get_winner() is not None
 
     def get_winner(self):
-        best, count = 0, 0
+        best, count = None, 0
         for player in self.players:
-            if count == 0 or player.points > best:
-                best = player.points
+            if best is None or player.points > best.points:
+                best = player
                 count = 1
-            elif player.points == best:
+            elif player.points == best.points:
                 count += 1
-        if best >= self.point_max and count == 1:
+        if best is not None and best.points >= self.point_max and count == 1:
             return best
         return None
 
+    @property
+    def active_player(self):
+        return self.turn_state.player if self.turn_state is not None else None
+
     def _next_turn_state(self):
         if self.turn_state is None:
             return TurnState(self.players[0])
@@ -152,57 +252,184 @@ class LocalGame(Game, threading.Thread):
             idx = 0
         return TurnState(self.players[idx])
 
-    def _take_turn(self):
+    async def _take_turn(self):
         self.turn_state = self._next_turn_state()
+        await self.perform_intent(intents.StartTurn(self.turn_state.player))
+        await self._play_turn()
 
+    async def _play_turn(self):
+        """ The plays of the player whose turn it is, and the end of the turn. """
+        player = self.turn_state.player
         while True:
             self._send_game_state()
-            (player, packet) = self._packet_queue.get(block=True)
-            if player == self.turn_state.player:
+            (sender, packet) = await self._next_packet()
+            if sender == player:
                 if isinstance(packet, packets.game.EndTurnPacket):
                     break
                 elif isinstance(packet, packets.game.PlayCardPacket):
-                    pass
-
-        self.draw_card(self.turn_state.player)
-        self.draw_card(self.turn_state.player)
+                    # card_id is whatever the client sent; only an int is looked up, and
+                    # not a bool, as True would match card 1
+                    card_id = packet.card_id
+                    if type(card_id) is not int:
+                        self._reject_play(player, None, 'unknown_card')
+                    elif card_id in self.get_legal_moves(player):
+                        reason = await self.play_card(player, self.zones.get_card(card_id))
+                        if reason is not None:
+                            self._reject_play(player, card_id, reason)
+                    else:
+                        self._reject_play(player, card_id, self._get_rejection(player, card_id))
+            elif isinstance(packet, packets.game.PlayCardPacket):
+                card_id = packet.card_id
+                self._reject_play(sender, card_id if type(card_id) is int else None, 'not_your_turn')
+
+        await self.rules.score_bases()
+        self.draw_cards(player, 2)
+        await self.perform_intent(intents.EndTurn(player))
+
+    def get_legal_moves(self, player):
+        """ The plays open to player, as play_card would make them: the cards in their
+            hand they have a minion or action left for and a target for, by id, with
+            the ids of the targets to choose from, none for actions on the field. A
+            card's ability may still cancel a play.
+
+            Cards and targets are in order of id, so the moves only depend on the
+            state. They are kept in move_table by its zobrist hash, where a state the
+            game comes back to finds them, as a fork restored for every rollout of a
+            search does; they are not to be changed. """
+        turn_state = self.turn_state
+        if turn_state is None or turn_state.player is not player:
+            return {}
+        version = self.zobrist.get_value()
+        moves = self.move_table.get(version)
+        if moves is not None:
+            return moves
+
+        moves = {}
+        base_ids = tuple(sorted(b.id for b in self.bases))
+        minion_ids = None
+        for card in sorted(player.hand, key=_get_id):
+            if isinstance(card, cards.MinionCard):
+                if turn_state.minions_left > 0:
+                    moves[card.id] = base_ids
+            elif isinstance(card, cards.ActionCard) and turn_state.actions_left > 0:
+                if cards.BaseCard in card.targets:
+                    moves[card.id] = base_ids
+                elif cards.MinionCard in card.targets:
+                    if minion_ids is None:
+                        minion_ids = tuple(sorted(m.id for m in self.board.get_minions()))
+                    if len(minion_ids) > 0:
+                        moves[card.id] = minion_ids
+                else:
+                    moves[card.id] = ()
+        self.move_table.put(version, moves)
+        return moves
+
+    def _get_rejection(self, player, card_id):
+        """ Why the card is not among the legal moves of the player. """
+        card = self.zones.get_card(card_id)
+        if card is None:
+            return 'unknown_card'
+        if card not in player.hand:
+            return 'not_in_hand'
+        if isinstance(card, cards.MinionCard):
+            return 'no_minions_left'
+        if self.turn_state.actions_left <= 0:
+            return 'no_actions_left'
+        return 'no_target'
+
+    def _reject_play(self, player, card_id, reason):
+        player.send_packet(packets.game.RejectPlayPacket(card_id, reason))
+
+    async def play_card(self, player, card):
+        """ Plays a card from the player's hand, asking for its target. Returns why
+            the play was not made, as a RejectPlayPacket reason, or None when it was. """
+        if card not in player.hand:
+            return 'not_in_hand'
+        if isinstance(card, cards.MinionCard):
+            if self.turn_state.minions_left <= 0:
+                return 'no_minions_left'
+            base = await self.request_selection(player, 'Choose a base.', self.bases)
+            intent = intents.PlayMinion(card, base)
+            await self.perform_intent(intent)
+            if intent.cancelled:
+                return 'cancelled'
+            self.turn_state.minions_left -= 1
+            await self.perform_intent(intents.ResolveMinionAbility(card))
+        elif isinstance(card, cards.ActionCard):
+            if self.turn_state.actions_left <= 0:
+                return 'no_actions_left'
+            if cards.BaseCard in card.targets:
+                intent = intents.PlayActionOnBase(card, await self.request_selection(
+                    player, 'Choose a base.', self.bases))
+            elif cards.MinionCard in card.targets:
+                minions = self.board.get_minions()
+                if len(minions) == 0:
+                    return 'no_target'
+                intent = intents.PlayActionOnMinion(card, await self.request_selection(
+                    player, 'Choose a minion.', minions))
+            else:
+                intent = intents.PlayActionOnField(card)
+            await self.perform_intent(intent)
+            if intent.cancelled:
+                return 'cancelled'
+            self.turn_state.actions_left -= 1
+            await self.perform_intent(intents.ResolveActionAbility(card))
+            if isinstance(card.state, cards.ActionOnFieldState) and not card.ongoing:
+                self.rules.discard_card(card)
+        return None
 
     def draw_card(self, player):
-        card = player.deck.remove_top()
-        if len(player.deck) == 0:
-            player.deck = player.discard
-            player.discard = Pile()
-            player.deck.shuffle()
-        player.hand.append(card)
-        return card
+        drawn = self.draw_cards(player, 1)
+        return drawn[0] if len(drawn) > 0 else None
+
+    def draw_cards(self, player, count):
+        """ Draws up to count cards, shuffling the discard into the deck when it runs out. """
+        drawn = []
+        while len(drawn) < count:
+            if len(player.deck) == 0:
+                for card in list(player.discard):
+                    self.zones.move(card, player.deck, cards.InDeckState())
+                self.zones.shuffle(player.deck)
+                if len(player.deck) == 0:
+                    break
+            drawn += self.zones.deal(player.deck, count - len(drawn), player.hand, cards.InHandState)
+        return drawn
 
     def _send_cards(self):
+        catalog_hashes = []
+        catalog_indices = {}
+        for player in self.players:
+            for deck in player.decks:
+                catalog.load_deck(deck)
+
         card_info = []
-        for card_id in self._cards_by_id:
-            card = self._cards_by_id[card_id]
-            info = {'id': card_id, 'name': card.name, 'text': card.text}
-            if isinstance(card, cards.MinionCard):
-                info['type'] = 'minion'
+        for card in self.zones:
+            card_id = card.id
+            card_catalog, definition = catalog.get_definition(card.__class__)
+            if card_catalog.hash not in catalog_indices:
+                catalog_indices[card_catalog.hash] = len(catalog_hashes)
+                catalog_hashes.append(card_catalog.hash)
+            info = {'id': card_id, 'catalog': catalog_indices[card_catalog.hash], 'definition': definition}
+            if isinstance(card, (cards.MinionCard, cards.ActionCard)):
                 info['player'] = card.player.user.name
-                info['power'] = card.base_power
-            elif isinstance(card, cards.ActionCard):
-                info['type'] = 'action'
-                info['player'] = card.player.user.name
-            elif isinstance(card, cards.BaseCard):
-                info['type'] = 'base'
-                info['power_threshold'] = card.power_threshold
-                info['award_points'] = {
-                    'first': card.award_points[0],
-                    'second': card.award_points[1],
-                    'third': card.award_points[2]
-                }
-            else:
-                raise ValueError('Unknown card type')
             card_info.append(info)
 
-        packet = packets.game.SetCardsPacket(card_info)
-        for player in self.players:
-            player.send_packet(packet)
+        self.broadcast_packet(packets.game.SetCardsPacket(catalog_hashes, card_info))
+
+    def _send_catalog(self, connection, catalog_hash):
+        card_catalog = catalog.get_catalog(catalog_hash)
+        if card_catalog is None:
+            return
+        self._catalog_frames_lock.acquire()
+        try:
+            if catalog_hash not in self._catalog_frames:
+                packet = packets.game.SetCatalogPacket(card_catalog.hash, card_catalog.deck_name,
+                                                       card_catalog.definitions)
+                self._catalog_frames[catalog_hash] = self._serializer.frame(packet)
+            frame = self._catalog_frames[catalog_hash]
+        finally:
+            self._catalog_frames_lock.release()
+        connection.send_frame(frame)
 
     def _send_game_state(self):
         base_info = []
@@ -210,7 +437,7 @@ class LocalGame(Game, threading.Thread):
             base_info.append({
                 'id': base.id,
                 'power_total': base.state.power,
-                'cards': [self._create_card_info(c) for c in base.state.minions+base.state.actions]
+                'cards': [self._create_card_info(c) for c in list(base.state.minions)+list(base.state.actions)]
             })
         player_info = []
         for player in self.players:
@@ -225,41 +452,52 @@ class LocalGame(Game, threading.Thread):
             'minions': self.turn_state.minions_left,
             'actions': self.turn_state.actions_left
         }
-        for player in self.players:
+        full_state = self._serializer.serialize_template(
+            packets.game.SetGameStatePacket(self.id, base_info, player_info, turn_info),
+            ('hand', 'moves', 'version', 'state_hash'))
+        for seat, player in enumerate(self.players):
             hand = [c.id for c in player.hand]
-            player.send_packet(packets.game.SetGameStatePacket(self.id, base_info, player_info, turn_info, hand))
+            moves = [{'id': card_id, 'targets': list(targets)}
+                     for card_id, targets in self.get_legal_moves(player).items()]
+            player.send_state(full_state, self.id, base_info, player_info, turn_info, hand, moves,
+                              zobrist.format_hash(self.zobrist.get_view(seat)))
 
     def _create_card_info(self, card):
-        info = {'id': card.id, 'actions': [self._create_card_info(a) for a in card.actions]}
+        info = {'id': card.id, 'actions': []}
         if isinstance(card, cards.MinionCard):
             info['power'] = card.state.power
+            info['actions'] = [self._create_card_info(a) for a in card.state.actions]
         return info
 
-    def request_selection(self, player, text, options):
-        self._reply_latch.counter = 1
-        request_id = self._make_request(player, text, options)
-        self._reply_latch.await()
-
-        reply = self._replies[request_id]
-        self._replies = {}
-        return reply
-
-    def request_selections(self, selections):
-        self._reply_latch.counter = len(selections)
-        selection_ids = {}
-        for id in selections:
-            player = selections[id]['player']
-            text = selections[id]['text']
-            options = selections[id]['options']
-            selection_ids[self._make_request(player, text, options)] = id
-        self._reply_latch.await()
-        replies = {}
-        for request_id in self._replies:
-            replies[selection_ids[request_id]] = self._replies[request_id]
-        self._replies = {}
-        return replies
-
-    def _make_request(self, player, text, options):
+    def broadcast_packet(self, packet):
+        frame = self._serializer.frame(packet)
+        for player in self.players:
+            player.send_frame(frame)
+
+    async def request_selection(self, player, text, options, timeout=None, default=None):
+        """ timeout and default override the game's selection_timeout and selection_default. """
+        request_id = self._make_request(player, text, options, timeout, default)
+        return await self._selections[request_id].future
+
+    async def request_selections(self, selections):
+        """ selections: id -> {player, text, options[, timeout][, default]} """
+        ids = list(selections)
+        request_ids = []
+        try:
+            for id in ids:
+                selection = selections[id]
+                request_ids.append(self._make_request(selection['player'], selection['text'], selection['options'],
+                                                      selection.get('timeout'), selection.get('default')))
+            options = await asyncio.gather(*[self._selections[request_id].future for request_id in request_ids])
+            return dict(zip(ids, options))
+        finally:
+            # when one fails the others are withdrawn rather than left to expire unawaited
+            for request_id in request_ids:
+                self._cancel_selection(request_id)
+
+    def _make_request(self, player, text, options, timeout, default):
+        if len(options) == 0:
+            raise ValueError('No selection options')
         request_id = self._request_id_counter
         self._request_id_counter += 1
         options_indexed = []
@@ -277,49 +515,119 @@ class LocalGame(Game, threading.Thread):
                 options_out.append({'id': opt_id, 'type': 'string', 'text': opt})
             else:
                 raise ValueError('Bad selection option')
-        self._request_options[request_id] = options_indexed
+
+        selection = _Selection(player, options_indexed, self._loop.create_future(),
+                               default if default is not None else self.selection_default)
+        if timeout is None:
+            timeout = self.selection_timeout
+        if timeout is not None:
+            selection.timer = self._timer_wheel.schedule(timeout, self._loop.call_soon_threadsafe,
+                                                         self._expire_selection, request_id)
+        self._selections[request_id] = selection
         player.send_packet(packets.game.RequestSelectionPacket(request_id, text, options_out))
         return request_id
 
     def reply_selection(self, request_id, option_id):
-        self._replies[request_id] = self._request_options[request_id][option_id]
-        self._reply_latch.count_down()
+        self._loop.call_soon_threadsafe(self._resolve_selection, request_id, option_id)
 
-    def handle_packet(self, player, packet):
-        if isinstance(packet, packets.game.ReplySelectionPacket):
-            self.reply_selection(packet.request_id, packet.option_id)
-        else:
-            self._packet_queue.put(packet)
+    def cancel_selection(self, request_id):
+        """ The game logic waiting for the selection gets a CancelledError. """
+        self._loop.call_soon_threadsafe(self._cancel_selection, request_id)
 
-    def perform_intent(self, intent):
-        self.intent_router.route_intent(intent)
+    def _resolve_selection(self, request_id, option_id):
+        selection = self._selections.get(request_id)
+        if selection is None:
+            return
+        if not isinstance(option_id, int) or not 0 <= option_id < len(selection.options):
+            return
+        self._close_selection(request_id, False)
+        selection.future.set_result(selection.options[option_id])
+
+    def _expire_selection(self, request_id):
+        selection = self._selections.get(request_id)
+        if selection is None:
+            return
+        self._close_selection(request_id, True)
+        if selection.default is None:
+            selection.future.set_exception(SelectionTimeoutException(request_id))
+            return
+        try:
+            option = selection.default(selection.options)
+        except Exception as e:
+            # raised in the game waiting for the selection, not in the loop's callback
+            selection.future.set_exception(e)
+            return
+        selection.future.set_result(option)
+
+    def _cancel_selection(self, request_id):
+        selection = self._selections.get(request_id)
+        if selection is None:
+            return
+        self._close_selection(request_id, True)
+        selection.future.cancel()
+
+    def _close_selection(self, request_id, notify):
+        selection = self._selections.pop(request_id)
+        if selection.timer is not None:
+            selection.timer.cancel()
+        if notify:
+            selection.player.send_packet(packets.game.CancelSelectionPacket(request_id))
+
+    def _put_packet(self, player, packet):
+        self._packets.append((player, packet))
+        if self._packet_waiter is not None and not self._packet_waiter.done():
+            self._packet_waiter.set_result(None)
+
+    async def _next_packet(self):
+        while len(self._packets) == 0:
+            self._packet_waiter = self._loop.create_future()
+            await self._packet_waiter
+        return self._packets.popleft()
+
+    async def perform_intent(self, intent):
+        await self.intent_router.route_intent(intent)
+
+    async def perform_intents(self, members):
+        """ Performs intents together, see IntentRouter.route_intents; intents of
+            different classes are routed one class after the other. """
+        by_class = {}
+        for intent in members:
+            by_class.setdefault(intent.__class__, []).append(intent)
+        for intent_class in by_class:
+            await self.intent_router.route_intents(by_class[intent_class])
 
     def receive_packet(self, user, connection, packet):
         if isinstance(packet, packets.game.ReplySelectionPacket):
             self.reply_selection(packet.request_id, packet.option_id)
             return
-        self._packet_queue.put((self._players_by_user[user], packet))
+        if isinstance(packet, packets.game.RequestCatalogPacket):
+            self._send_catalog(connection, packet.catalog)
+            return
+        if isinstance(packet, packets.game.AckGameStatePacket):
+            self._players_by_user[user].acknowledge_state(connection, packet.version, packet.state_hash)
+            return
+        if isinstance(packet, packets.game.ResyncGameStatePacket):
+            # queued as well so the game loop wakes up and sends the full state
+            self._players_by_user[user].request_resync(connection)
+        self._loop.call_soon_threadsafe(self._put_packet, self._players_by_user[user], packet)
 
     def add_connection(self, user, connection):
         if user in self._players_by_user:
-            connection.serializer.register(packets.game.RequestSelectionPacket, 'request_selection')
-            connection.serializer.register(packets.game.EndGamePacket, 'end_game')
-            connection.serializer.register(packets.game.SetCardsPacket, 'set_cards')
-            connection.serializer.register(packets.game.SetGameStatePacket, 'set_state')
-            connection.deserializer.register(packets.game.ReplySelectionPacket, 'reply_selection')
-            connection.deserializer.register(packets.game.PlayCardPacket, 'play_card')
-            connection.deserializer.register(packets.game.EndTurnPacket, 'end_turn')
+            connection.protocol = packets.game.PROTOCOL
+            connection.game = self
             self._players_by_user[user].add_connection(connection)
 
     def remove_connection(self, user, connection):
         if user in self._players_by_user:
             self._players_by_user[user].remove_connection(connection)
-            connection.serializer.unregister(packets.game.RequestSelectionPacket)
-            connection.serializer.unregister(packets.game.EndGamePacket)
-            connection.serializer.unregister(packets.game.SetCardsPacket)
-            connection.serializer.unregister(packets.game.SetGameStatePacket)
-            connection.deserializer.unregister(packets.game.ReplySelectionPacket)
-            connection.deserializer.unregister(packets.game.EndTurnPacket)
+            connection.protocol = packets.server.PROTOCOL
+            if connection.game is self:
+                connection.game = None
+
+    def get_connections(self, user):
+        if user not in self._players_by_user:
+            return []
+        return self._players_by_user[user].get_connections()
 
     def has_connection(self, user, connection):
         return user in self._players_by_user and self._players_by_user[user].has_connection(connection)
@@ -331,6 +639,19 @@ class LocalGame(Game, threading.Thread):
         return user in self._players_by_user
 
 
+class _Selection:
+    def __init__(self, player, options, future, default):
+        self.player = player
+        self.options = options
+        self.future = future
+        self.default = default
+        self.timer = None
+
+
+class SelectionTimeoutException(Exception):
+    pass
+
+
 class TurnState:
     def __init__(self, player):
         self.player = player
@@ -8,50 +8,253 @@ class Intent:
     def cancel(self):
         self.cancelled = True
 
+    def get_card(self):
+        """ The card the intent is about, if any. """
+        return None
+
+    def get_player(self):
+        """ The player the intent is about; for card intents the card's owner. """
+        card = self.get_card()
+        if card is None:
+            return None
+        owner = getattr(card.state, 'owner', None)
+        return owner if owner is not None else getattr(card, 'player', None)
+
+    def get_base(self):
+        """ The base the intent happens on; for card intents the base the card is on. """
+        card = self.get_card()
+        if card is None:
+            return None
+        state = card.state
+        minion = getattr(state, 'minion', None)
+        if minion is not None:
+            state = minion.state
+        return getattr(state, 'base', None)
+
 
 class IntentConsumer:
-    def get_intent_list(self):
-        raise NotImplementedError
+    __slots__ = ()
 
-    def get_intent_handlers(self, intent):
+    def get_subscriptions(self):
         raise NotImplementedError
 
+    def get_zone(self):
+        """ The zone the consumer is in; only its subscriptions active there are routed to. """
+        return None
+
+
+ZONE_DECK = 'deck'
+ZONE_HAND = 'hand'
+ZONE_DISCARD = 'discard'
+ZONE_PLAY = 'play'
+
+
+class Subscription:
+    """ Interest of a handler in intents of a class, and its subclasses, at one priority.
+        A subscription may be narrowed to intents about one card, one player or one
+        base; the handler is awaited with the intent. It is active while its consumer
+        is in one of zones, or always if zones is None. """
+    def __init__(self, intent_class, priority, handler, card=None, player=None, base=None, zones=(ZONE_PLAY,)):
+        if sum([1 for f in (card, player, base) if f is not None]) > 1:
+            raise ValueError('A subscription is narrowed to one card, player or base at most')
+        self.intent_class = intent_class
+        self.priority = priority
+        self.handler = handler
+        self.card = card
+        self.player = player
+        self.base = base
+        self.zones = zones
+
+
+class _Bucket:
+    """ The subscriptions to one intent class at one priority, indexed by what they
+        are narrowed to. Each index holds an insertion-ordered dict, so a subscription
+        is removed in O(1). """
+    def __init__(self):
+        self.any = {}
+        self.by_card = {}
+        self.by_player = {}
+        self.by_base = {}
+
+    def add(self, subscription):
+        index, key = self._index(subscription)
+        if index is None:
+            self.any[subscription] = None
+        else:
+            subscriptions = index.get(key)
+            if subscriptions is None:
+                subscriptions = {}
+                index[key] = subscriptions
+            subscriptions[subscription] = None
+
+    def remove(self, subscription):
+        index, key = self._index(subscription)
+        if index is None:
+            del self.any[subscription]
+        else:
+            subscriptions = index[key]
+            del subscriptions[subscription]
+            if len(subscriptions) == 0:
+                del index[key]
+
+    def _index(self, subscription):
+        if subscription.card is not None:
+            return self.by_card, subscription.card.id
+        if subscription.player is not None:
+            return self.by_player, subscription.player
+        if subscription.base is not None:
+            return self.by_base, subscription.base.id
+        return None, None
+
 
 class IntentRouter:
+    """ Routes an intent to the handlers subscribed to its class or one of its bases.
+
+        The dispatch table of an intent class, i.e. the buckets of every class in its
+        MRO sorted by priority, is built on first use and only rebuilt when a
+        subscription opens a new bucket. Routing an intent then touches the handlers
+        that are not narrowed and those narrowed to the intent's card, player or base;
+        these are taken once, when the intent is routed.
+
+        A registered consumer only has its subscriptions for its current zone
+        subscribed. Cards call refresh when their state changes, so the cost of
+        routing follows the cards in play rather than all cards of the game. A
+        handler unsubscribed while an intent is being routed is not called for it. """
     def __init__(self):
-        self._consumers = {}
-
-    def route_intent(self, intent):
-        handlers = {}
-        for consumer in self._consumers[intent.__class__]:
-            consumer_handlers = consumer.get_intent_handlers(intent)
-            for priority in consumer_handlers:
-                if priority in handlers:
-                    handlers[priority] += consumer_handlers[priority]
-                else:
-                    handlers[priority] = consumer_handlers[priority]
-
-        for priority in sorted(handlers):
+        self._buckets = {}
+        self._tables = {}
+        self._active = {}
+
+    async def route_intent(self, intent):
+        table = self._tables.get(intent.__class__)
+        if table is None:
+            table = self._build_table(intent.__class__)
+
+        card = intent.get_card()
+        card_id = card.id if card is not None else None
+        player = intent.get_player()
+        base = intent.get_base()
+        base_id = base.id if base is not None else None
+
+        for priority, buckets in table:
             # TODO select order of handlers (?)
-            for handler in handlers[priority]:
-                handler.handle_intent(intent)
+            for bucket in buckets:
+                for subscriptions in (bucket.any, bucket.by_card.get(card_id, ()),
+                                      bucket.by_player.get(player, ()), bucket.by_base.get(base_id, ())):
+                    if len(subscriptions) == 0:
+                        continue
+                    for subscription in tuple(subscriptions):
+                        if subscription not in subscriptions:
+                            continue
+                        await subscription.handler(intent)
+                        if intent.cancelled:
+                            if priority != PRIORITY_CANCEL and priority != PRIORITY_CANCEL_AND_MODIFY:
+                                # TODO warn
+                                pass
+                            return
+
+    async def route_intents(self, members):
+        """ Routes intents of one class, e.g. the targets of an area effect, in a single
+            pass over the dispatch table: at each priority every handler sees every
+            member still standing before the next priority, and cancelling a member
+            only drops that member. """
+        if len(members) == 0:
+            return
+        intent_class = members[0].__class__
+        table = self._tables.get(intent_class)
+        if table is None:
+            table = self._build_table(intent_class)
+
+        by_card, by_player, by_base = {}, {}, {}
+        for intent in members:
+            if intent.__class__ is not intent_class:
+                raise ValueError('Routed intents must be of one class')
+            card = intent.get_card()
+            if card is not None:
+                by_card.setdefault(card.id, []).append(intent)
+            player = intent.get_player()
+            if player is not None:
+                by_player.setdefault(player, []).append(intent)
+            base = intent.get_base()
+            if base is not None:
+                by_base.setdefault(base.id, []).append(intent)
+
+        for priority, buckets in table:
+            for bucket in buckets:
+                if len(bucket.any) > 0:
+                    await self._route_members(bucket.any, members)
+                for index, members_by_key in ((bucket.by_card, by_card), (bucket.by_player, by_player),
+                                              (bucket.by_base, by_base)):
+                    if len(index) == 0:
+                        continue
+                    for key in members_by_key:
+                        subscriptions = index.get(key)
+                        if subscriptions is not None:
+                            await self._route_members(subscriptions, members_by_key[key])
+
+    async def _route_members(self, subscriptions, members):
+        for subscription in tuple(subscriptions):
+            for intent in members:
                 if intent.cancelled:
-                    if priority != PRIORITY_CANCEL and priority != PRIORITY_CANCEL_AND_MODIFY:
-                        # TODO warn
-                        pass
+                    continue
+                if subscription not in subscriptions:
                     break
+                await subscription.handler(intent)
 
     def register(self, consumer):
-        for intent in consumer.get_intent_list():
-            for intent_class in self._consumers:
-                if issubclass(intent, intent_class):
-                    self._consumers[intent_class] += consumer
-            if intent not in self._consumers:
-                self._consumers[intent] = [consumer]
+        zone = consumer.get_zone()
+        active = [s for s in consumer.get_subscriptions() if s.zones is None or zone in s.zones]
+        for subscription in active:
+            self.subscribe(subscription)
+        self._active[consumer] = active
 
     def unregister(self, consumer):
-        # haha nice joke
-        raise NotImplementedError
+        for subscription in self._active.pop(consumer):
+            self.unsubscribe(subscription)
+
+    def refresh(self, consumer):
+        """ Re-subscribes a registered consumer after its zone or what its subscriptions
+            are narrowed to changed. """
+        if consumer in self._active:
+            self.unregister(consumer)
+            self.register(consumer)
+
+    def subscribe(self, subscription):
+        key = (subscription.intent_class, subscription.priority)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket()
+            self._buckets[key] = bucket
+            self._tables = {}
+        bucket.add(subscription)
+
+    def unsubscribe(self, subscription):
+        self._buckets[(subscription.intent_class, subscription.priority)].remove(subscription)
+
+    def get_subscriptions(self, intent_class):
+        """ The subscriptions an intent of intent_class is routed to, whatever it is
+            about, in dispatch order. """
+        table = self._tables.get(intent_class)
+        if table is None:
+            table = self._build_table(intent_class)
+        subscriptions = []
+        for priority, buckets in table:
+            for bucket in buckets:
+                subscriptions.extend(bucket.any)
+                for index in (bucket.by_card, bucket.by_player, bucket.by_base):
+                    for narrowed in index.values():
+                        subscriptions.extend(narrowed)
+        return subscriptions
+
+    def _build_table(self, intent_class):
+        buckets_by_priority = {}
+        for cls in intent_class.__mro__:
+            for key in self._buckets:
+                if key[0] is cls:
+                    buckets_by_priority.setdefault(key[1], []).append(self._buckets[key])
+        table = [(priority, buckets_by_priority[priority]) for priority in sorted(buckets_by_priority)]
+        self._tables[intent_class] = table
+        return table
 
 """ Turn Intents """
 
@@ -61,12 +264,18 @@ class StartTurn(Intent):
         super().__init__()
         self.player = player
 
+    def get_player(self):
+        return self.player
+
 
 class EndTurn(Intent):
     def __init__(self, player):
         super().__init__()
         self.player = player
 
+    def get_player(self):
+        return self.player
+
 
 """ General Card Intents """
 
@@ -76,12 +285,18 @@ class PlayCard(Intent):
         super().__init__()
         self.card = card
 
+    def get_card(self):
+        return self.card
+
 
 class RemoveCardFromPlay(Intent):
     def __init__(self, card):
         super().__init__()
         self.card = card
 
+    def get_card(self):
+        return self.card
+
 
 class DestroyCard(RemoveCardFromPlay):
     def __init__(self, card):
@@ -113,6 +328,9 @@ class ResolveCardAbility(Intent):
         super().__init__()
         self.card = card
 
+    def get_card(self):
+        return self.card
+
 
 class ChangeCardOwner(Intent):
     def __init__(self, card, new_owner):
@@ -120,6 +338,9 @@ class ChangeCardOwner(Intent):
         self.card = card
         self.new_owner = new_owner
 
+    def get_card(self):
+        return self.card
+
 
 """ Base Card Intents """
 
@@ -129,12 +350,24 @@ class PlayBase(Intent):
         super().__init__()
         self.base = base
 
+    def get_card(self):
+        return self.base
+
+    def get_base(self):
+        return self.base
+
 
 class BlowBase(Intent):
     def __init__(self, base):
         super().__init__()
         self.base = base
 
+    def get_card(self):
+        return self.base
+
+    def get_base(self):
+        return self.base
+
 
 class SwapBase(Intent):
     def __init__(self, base_from, base_to):
@@ -148,6 +381,12 @@ class RemoveBase(Intent):
         super().__init__()
         self.base = base
 
+    def get_card(self):
+        return self.base
+
+    def get_base(self):
+        return self.base
+
 
 class ModifyBasePowerThreshold(Intent):
     def __init__(self, base, off):
@@ -155,25 +394,40 @@ class ModifyBasePowerThreshold(Intent):
         self.base = base
         self.off = off
 
+    def get_card(self):
+        return self.base
+
+    def get_base(self):
+        return self.base
+
 
 """ Minion Card Intents """
 
 
 class AffectMinion(Intent):
-    def __init__(self, minion):
+    def __init__(self, minion=None):
         super().__init__()
         self.minion = minion
 
+    def get_card(self):
+        return self.minion
+
 
 class PlayMinion(PlayCard):
-    def __init__(self, minion):
+    def __init__(self, minion, base):
         super().__init__(minion)
         self.minion = minion
+        self.base = base
+
+    def get_base(self):
+        return self.base
 
 
 class RemoveMinionFromPlay(RemoveCardFromPlay, AffectMinion):
     def __init__(self, minion):
+        # the cooperative chain reaches AffectMinion through RemoveCardFromPlay without the minion
         super().__init__(minion)
+        self.minion = minion
 
 
 class DestroyMinion(RemoveMinionFromPlay, DestroyCard):
@@ -214,10 +468,17 @@ class ResolveMinionAbility(ResolveCardAbility):
 
 
 class ModifyMinionPower(Intent):
-    def __init__(self, minion, off):
+    """ Resolves into a modifier of the minion's power, see cards.Modifier; without a
+        duration it lasts while the minion is in play. """
+    def __init__(self, minion, off, source=None, duration=None):
         super().__init__()
         self.minion = minion
         self.off = off
+        self.source = source
+        self.duration = duration
+
+    def get_card(self):
+        return self.minion
 
 
 """ Action Card Intents """
@@ -234,6 +495,9 @@ class PlayActionOnBase(PlayAction):
         super().__init__(action)
         self.target = target
 
+    def get_base(self):
+        return self.target
+
 
 class PlayActionOnMinion(PlayAction):
     def __init__(self, action, target):
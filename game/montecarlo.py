@@ -0,0 +1,134 @@
+# MONTE-CARLO SELF-PLAY
+# run from the game directory: python -m montecarlo [games] [--players N] [--workers N]
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from game import GameConfig
+from simulation import HeadlessGame, RandomAgent
+from user import User
+from decks.dinosaurs import DinosaursDeck
+
+DEFAULT_DECKS = (DinosaursDeck,)*10
+
+# z of a two-sided 95% confidence interval
+_Z = 1.96
+
+
+def play_game(seed, players, deck_classes=DEFAULT_DECKS, max_turns=500):
+    """ Plays a game of random agents seeded by seed. Returns its result: the seat
+        of the winner (-1 if none), the turns taken, the cards played, the points
+        and the names of the decks of each seat. """
+    users = [User('player'+str(p)) for p in range(players)]
+    config = GameConfig(users, [deck_class() for deck_class in deck_classes], seed=seed)
+    game = HeadlessGame(seed, config, [RandomAgent(seed*players+p) for p in range(players)], max_turns)
+    winner = game.play()
+    return {'seed': seed,
+            'winner': game.players.index(winner) if winner is not None else -1,
+            'turns': game.turns,
+            'plays': game.plays,
+            'points': [p.points for p in game.players],
+            'decks': [[d.name for d in p.decks] for p in game.players]}
+
+
+def _play_games(seeds, players, deck_classes, max_turns):
+    return [play_game(seed, players, deck_classes, max_turns) for seed in seeds]
+
+
+def run_games(count, players, deck_classes=DEFAULT_DECKS, max_turns=500, workers=None, chunk_size=25,
+              first_seed=0):
+    """ Plays count games with the seeds from first_seed on, spread over a pool of
+        worker processes in chunks of chunk_size games. Yields the results as the
+        chunks finish, in no particular order. """
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_play_games, range(seed, min(seed+chunk_size, first_seed+count)),
+                                   players, deck_classes, max_turns)
+                   for seed in range(first_seed, first_seed+count, chunk_size)]
+        for future in as_completed(futures):
+            for result in future.result():
+                yield result
+
+
+def _wilson(successes, trials):
+    """ 95% Wilson score intervals of the rates successes / trials, as (low, high). """
+    trials = np.maximum(trials, 1)
+    rate = successes / trials
+    denominator = 1 + _Z**2 / trials
+    center = (rate + _Z**2 / (2*trials)) / denominator
+    half = _Z * np.sqrt(rate*(1-rate) / trials + _Z**2 / (4*trials**2)) / denominator
+    return center - half, center + half
+
+
+def summarize(results, players):
+    """ Win rates per seat and per deck with 95% confidence intervals, and the means
+        of turns, plays and points per game. """
+    count = len(results)
+    winners = np.array([r['winner'] for r in results], dtype=np.int64)
+    turns = np.array([r['turns'] for r in results], dtype=np.float64)
+    plays = np.array([r['plays'] for r in results], dtype=np.float64)
+    points = np.array([r['points'] for r in results], dtype=np.float64).reshape(count, players)
+
+    seat_wins = np.bincount(winners[winners >= 0], minlength=players)
+    seat_low, seat_high = _wilson(seat_wins, count)
+
+    deck_names = sorted(set([name for r in results for seat in r['decks'] for name in seat]))
+    deck_index = dict((name, idx) for idx, name in enumerate(deck_names))
+    deck_games = np.zeros(len(deck_names), dtype=np.int64)
+    deck_wins = np.zeros(len(deck_names), dtype=np.int64)
+    for r in results:
+        for seat, names in enumerate(r['decks']):
+            for idx in set([deck_index[name] for name in names]):
+                deck_games[idx] += 1
+                if r['winner'] == seat:
+                    deck_wins[idx] += 1
+    deck_low, deck_high = _wilson(deck_wins, deck_games)
+
+    def mean(values):
+        spread = _Z * values.std(ddof=1) / np.sqrt(count) if count > 1 else 0.0
+        return float(values.mean()), float(spread)
+
+    return {'games': count,
+            'unfinished': int(np.count_nonzero(winners < 0)),
+            'seats': [{'wins': int(seat_wins[s]), 'rate': float(seat_wins[s] / count),
+                       'ci': (float(seat_low[s]), float(seat_high[s])),
+                       'points': float(points[:, s].mean())} for s in range(players)],
+            'decks': dict((name, {'games': int(deck_games[i]), 'wins': int(deck_wins[i]),
+                                  'rate': float(deck_wins[i] / max(deck_games[i], 1)),
+                                  'ci': (float(deck_low[i]), float(deck_high[i]))})
+                          for i, name in enumerate(deck_names)),
+            'turns': mean(turns),
+            'plays': mean(plays)}
+
+
+def print_summary(summary):
+    print('%d games, %d without a winner' % (summary['games'], summary['unfinished']))
+    print('turns/game %.1f +- %.1f, plays/game %.1f +- %.1f' % (summary['turns'] + summary['plays']))
+    for seat, stats in enumerate(summary['seats']):
+        print('seat %d  wins %5d  rate %.3f [%.3f, %.3f]  points %.1f' % (
+            seat, stats['wins'], stats['rate'], stats['ci'][0], stats['ci'][1], stats['points']))
+    for name in summary['decks']:
+        stats = summary['decks'][name]
+        print('%-12s games %5d  rate %.3f [%.3f, %.3f]' % (
+            name, stats['games'], stats['rate'], stats['ci'][0], stats['ci'][1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays games of random agents and reports win rates.')
+    parser.add_argument('games', type=int, nargs='?', default=1000)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=None, help='processes, one per core by default')
+    parser.add_argument('--chunk-size', type=int, default=25)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--max-turns', type=int, default=500)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = list(run_games(args.games, args.players, DEFAULT_DECKS, args.max_turns, args.workers,
+                             args.chunk_size, args.seed))
+    elapsed = time.perf_counter() - start
+    print_summary(summarize(results, args.players))
+    print('%.1f games/sec' % (len(results) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,69 +1,255 @@
 # PACKETS
 import json
-from util import RWLock
+from . import binary
+
+
+CODEC_JSON = 'json'
+CODEC_BINARY = 'binary'
+CODECS = [CODEC_BINARY, CODEC_JSON]
+
+
+class Protocol:
+    """ The packets a connection may send (serializer) and receive (deserializer).
+        Protocols are immutable and shared between connections; a connection
+        switches protocol by pointing at another one. """
+    def __init__(self, serializer=None, deserializer=None):
+        self.serializer = serializer if serializer is not None else PacketSerializer()
+        self.deserializer = deserializer if deserializer is not None else PacketSerializer()
+
+    def outbound(self, packet_class, packet_name=None):
+        return Protocol(self.serializer.register(packet_class, packet_name), self.deserializer)
+
+    def inbound(self, packet_class, packet_name=None):
+        return Protocol(self.serializer, self.deserializer.register(packet_class, packet_name))
 
 
 class PacketSerializer:
-    def __init__(self):
-        self._packets_by_class = {}
-        self._packets_by_name = {}
-        self._packet_lock = RWLock()
+    """ Immutable; register and unregister return a new serializer.
+
+        JSON packets are text frames of the form {"__packet_name": name, field: value...}.
+        Binary packets are binary frames holding a packed array of the packet id
+        followed by the field values in __slots__ order. Packet ids are assigned in
+        registration order, so a protocol extending another keeps its ids. """
+    def __init__(self, codecs_by_class=None, codecs_by_name=None, codecs_by_id=None):
+        self._codecs_by_class = codecs_by_class if codecs_by_class is not None else {}
+        self._codecs_by_name = codecs_by_name if codecs_by_name is not None else {}
+        self._codecs_by_id = codecs_by_id if codecs_by_id is not None else {}
 
     def register(self, packet_class, packet_name=None):
-        self._packet_lock.writer_acquire()
-        try:
-            if packet_name is None:
-                packet_name = packet_class.__name__
-            if packet_name in self._packets_by_name:
-                raise PacketConflictException("Conflicting packet name '" + packet_name + "'")
-            self._packets_by_name[packet_name] = packet_class
-            self._packets_by_class[packet_class] = packet_name
-        finally:
-            self._packet_lock.writer_release()
+        if packet_name is None:
+            packet_name = packet_class.__name__
+        if packet_name in self._codecs_by_name:
+            raise PacketConflictException("Conflicting packet name '" + packet_name + "'")
+        packet_id = max(self._codecs_by_id) + 1 if len(self._codecs_by_id) > 0 else 0
+        codec = PacketCodec(packet_class, packet_name, packet_id)
+        codecs_by_class = dict(self._codecs_by_class)
+        codecs_by_class[packet_class] = codec
+        codecs_by_name = dict(self._codecs_by_name)
+        codecs_by_name[packet_name] = codec
+        codecs_by_id = dict(self._codecs_by_id)
+        codecs_by_id[packet_id] = codec
+        return PacketSerializer(codecs_by_class, codecs_by_name, codecs_by_id)
 
     def unregister(self, packet_class):
-        self._packet_lock.writer_acquire()
-        try:
-            name = self._packets_by_class[packet_class]
-            del self._packets_by_class[packet_class]
-            del self._packets_by_name[name]
-        finally:
-            self._packet_lock.writer_release()
-
-    def serialize(self, packet):
-        self._packet_lock.reader_acquire()
-        try:
-            if packet.__class__ not in self._packets_by_class:
-                raise BadPacketException("Tried to serialize unknown packet '" + str(packet.__class__) + "'")
+        codec = self._codecs_by_class[packet_class]
+        codecs_by_class = dict(self._codecs_by_class)
+        del codecs_by_class[packet_class]
+        codecs_by_name = dict(self._codecs_by_name)
+        del codecs_by_name[codec.name]
+        codecs_by_id = dict(self._codecs_by_id)
+        del codecs_by_id[codec.id]
+        return PacketSerializer(codecs_by_class, codecs_by_name, codecs_by_id)
+
+    def packet_ids(self):
+        return dict((name, self._codecs_by_name[name].id) for name in self._codecs_by_name)
+
+    def serialize(self, packet, codec=CODEC_JSON):
+        packet_codec = self._get_codec(packet)
+        if codec == CODEC_BINARY:
+            return packet_codec.encode_binary(packet)
+        return packet_codec.encode(packet)
+
+    def frame(self, packet):
+        return Frame(self._get_codec(packet), packet)
 
-            table = {'__packet_name': self._packets_by_class[packet.__class__]}
-            for name in vars(packet):
-                table[name] = getattr(packet, name)
+    def serialize_template(self, packet, open_fields):
+        return PacketTemplate(self._get_codec(packet), packet, open_fields)
 
-            return json.dumps(table)
-        finally:
-            self._packet_lock.reader_release()
+    def deserialize(self, message):
+        if isinstance(message, (bytes, bytearray)):
+            try:
+                values = binary.unpack(message)
+            except binary.BinaryFormatException as e:
+                raise BadPacketException('Tried to deserialize malformed packet: ' + str(e))
+            # a bool is an int, but not a packet id
+            if not isinstance(values, list) or len(values) == 0 or type(values[0]) is not int:
+                raise BadPacketException('Tried to deserialize malformed packet')
+            codec = self._codecs_by_id.get(values[0])
+            if codec is None:
+                raise BadPacketException("Tried to deserialize unknown packet '" + str(values[0]) + "'")
+            return codec.decode_binary(values)
 
-    def deserialize(self, string):
-        self._packet_lock.reader_acquire()
         try:
-            table = json.loads(string)
-            if '__packet_name' not in table or table['__packet_name'] not in self._packets_by_name:
-                raise BadPacketException("Tried to deserialize unknown packet '" + table)
-
-            packet = self._packets_by_name[table['__packet_name']].__call__()
-            targets = [x for x in vars(packet)]
-            for f in table:
-                if f != '__packet_name':
-                    if f not in targets:
-                        raise BadPacketException("Bad initialization of packet '" + table['__packet_name'] + "'")
-                    setattr(packet, f, table[f])
-                    targets.remove(f)
-            if len(targets) != 0:
-                raise BadPacketException("Bad initialization of packet '" + table['__packet_name'] + "'")
-            return packet
-        finally:
-            self._packet_lock.reader_release()
+            table = json.loads(message)
+        except (ValueError, RecursionError):
+            raise BadPacketException('Tried to deserialize malformed packet')
+        if not isinstance(table, dict) or not isinstance(table.get('__packet_name'), str):
+            raise BadPacketException('Tried to deserialize malformed packet')
+        codec = self._codecs_by_name.get(table.get('__packet_name'))
+        if codec is None:
+            raise BadPacketException("Tried to deserialize unknown packet '" + str(table.get('__packet_name')) + "'")
+        return codec.decode(table)
+
+    def _get_codec(self, packet):
+        codec = self._codecs_by_class.get(packet.__class__)
+        if codec is None:
+            raise BadPacketException("Tried to serialize unknown packet '" + str(packet.__class__) + "'")
+        return codec
+
+
+class PacketCodec:
+    """ Encoders and decoders generated for a single packet class from the fields it
+        declares in __slots__. """
+    def __init__(self, packet_class, packet_name, packet_id):
+        self.packet_class = packet_class
+        self.name = packet_name
+        self.id = packet_id
+        self.fields = packet_fields(packet_class)
+        self.defaults = packet_class.defaults
+        (self.encode, self.decode,
+         self.encode_binary, self.decode_binary) = _compile_codec(packet_class, packet_name, packet_id,
+                                                                  self.fields, self.defaults)
+
+
+def packet_fields(packet_class):
+    fields = []
+    for cls in reversed(packet_class.__mro__):
+        for name in cls.__dict__.get('__slots__', ()):
+            if name not in fields:
+                fields.append(name)
+    return tuple(fields)
+
+
+def _compile_codec(packet_class, packet_name, packet_id, fields, defaults):
+    required = fields[:len(fields)-len(defaults)]
+    if set(required) & set(defaults):
+        raise ValueError("Optional fields of packet '" + packet_name + "' must come last")
+
+    entries = ''.join(', %r: packet.%s' % (f, f) for f in fields)
+    values = ''.join(', packet.%s' % f for f in fields)
+    assignments = ''.join('    packet.%s = table[%r]\n' % (f, f) for f in fields)
+    binary_assignments = ''.join('    packet.%s = values[%d]\n' % (f, i+1) for i, f in enumerate(fields))
+    error = "Bad initialization of packet '" + packet_name + "'"
+    source = (
+        'def encode(packet):\n'
+        '    return dumps({"__packet_name": %r%s})\n'
+        'def encode_binary(packet):\n'
+        '    return pack([%d%s])\n'
+        'def decode(table):\n'
+        '    if table.keys() != keys:\n'
+        '        if not required_keys <= table.keys() <= keys:\n'
+        '            raise BadPacketException(%r)\n'
+        '        table = dict(defaults, **table)\n'
+        '    packet = new(packet_class)\n'
+        '%s'
+        '    return packet\n'
+        'def decode_binary(values):\n'
+        '    if len(values) != %d:\n'
+        '        if not %d <= len(values) <= %d:\n'
+        '            raise BadPacketException(%r)\n'
+        '        values = values + default_values[len(values)-%d:]\n'
+        '    packet = new(packet_class)\n'
+        '%s'
+        '    return packet\n'
+    ) % (packet_name, entries,
+         packet_id, values,
+         error, assignments,
+         len(fields)+1, len(required)+1, len(fields)+1, error, len(required)+1, binary_assignments)
+    namespace = {
+        'dumps': json.dumps,
+        'pack': binary.pack,
+        'keys': frozenset(fields + ('__packet_name',)),
+        'required_keys': frozenset(required + ('__packet_name',)),
+        'defaults': defaults,
+        'default_values': [defaults[f] for f in fields[len(required):]],
+        'new': object.__new__,
+        'packet_class': packet_class,
+        'BadPacketException': BadPacketException
+    }
+    exec(source, namespace)
+    return namespace['encode'], namespace['decode'], namespace['encode_binary'], namespace['decode_binary']
+
+
+class Frame:
+    """ An outgoing packet encoded at most once per codec, so the same frame can be
+        handed to any number of connections. """
+    def __init__(self, codec, packet):
+        self._codec = codec
+        self._packet = packet
+        self._messages = {}
+
+    def encode(self, codec):
+        message = self._messages.get(codec)
+        if message is None:
+            message = self._encode(codec)
+            self._messages[codec] = message
+        return message
+
+    def _encode(self, codec):
+        if codec == CODEC_BINARY:
+            return self._codec.encode_binary(self._packet)
+        return self._codec.encode(self._packet)
+
+
+class PacketTemplate:
+    """ A packet with some of its fields left open. Everything else is serialized
+        once per codec, on first use, and the open fields are spliced in per fill. """
+    def __init__(self, codec, packet, open_fields):
+        self._codec = codec
+        self._packet = packet
+        self._open_fields = tuple(open_fields)
+        self._json_prefix = None
+        self._binary_fields = None
+
+    def fill(self, **values):
+        if len(values) != len(self._open_fields):
+            raise BadPacketException("Bad fill of packet '" + self._codec.name + "'")
+        return _TemplateFrame(self, values)
+
+    def encode(self, codec, values):
+        if codec == CODEC_BINARY:
+            if self._binary_fields is None:
+                self._binary_fields = [binary.pack_array_header(len(self._codec.fields)+1), binary.pack(self._codec.id)]
+                for name in self._codec.fields:
+                    self._binary_fields.append(None if name in self._open_fields
+                                               else binary.pack(getattr(self._packet, name)))
+            parts = list(self._binary_fields)
+            for idx, name in enumerate(self._codec.fields):
+                if parts[idx+2] is None:
+                    parts[idx+2] = binary.pack(values[name])
+            return b''.join(parts)
+
+        if self._json_prefix is None:
+            table = {'__packet_name': self._codec.name}
+            for name in self._codec.fields:
+                if name not in self._open_fields:
+                    table[name] = getattr(self._packet, name)
+            self._json_prefix = json.dumps(table)[:-1]
+        parts = [self._json_prefix]
+        for name in self._open_fields:
+            parts.append(', ' + json.dumps(name) + ': ' + json.dumps(values[name]))
+        parts.append('}')
+        return ''.join(parts)
+
+
+class _TemplateFrame(Frame):
+    def __init__(self, template, values):
+        super().__init__(None, None)
+        self._template = template
+        self._values = values
+
+    def _encode(self, codec):
+        return self._template.encode(codec, self._values)
 
 
 class BadPacketException(Exception):
@@ -75,4 +261,7 @@ class PacketConflictException(Exception):
 
 
 class Packet(object):
-    pass
+    """ Packets declare their fields in __slots__; every field is serialized. Fields
+        listed in defaults may be left out by the sender and must come last. """
+    __slots__ = ()
+    defaults = {}
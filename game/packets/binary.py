@@ -0,0 +1,261 @@
+# BINARY VALUE ENCODING
+# A subset of MessagePack: nil, booleans, integers, floats, strings, bytes, arrays and maps.
+import struct
+
+
+class BinaryFormatException(Exception):
+    pass
+
+
+_BYTES = [bytes([i]) for i in range(0x100)]
+_STRUCT_B = struct.Struct('>B')
+_STRUCT_H = struct.Struct('>H')
+_STRUCT_I = struct.Struct('>I')
+_STRUCT_Q = struct.Struct('>Q')
+_STRUCT_b = struct.Struct('>b')
+_STRUCT_h = struct.Struct('>h')
+_STRUCT_i = struct.Struct('>i')
+_STRUCT_q = struct.Struct('>q')
+_STRUCT_d = struct.Struct('>d')
+
+# arrays and maps nested deeper are refused rather than recursed into
+MAX_DEPTH = 32
+
+
+def pack(value):
+    parts = []
+    _pack(value, parts)
+    return b''.join(parts)
+
+
+def pack_array_header(length):
+    if length < 16:
+        return _BYTES[0x90 | length]
+    if length <= 0xffff:
+        return b'\xdc' + _STRUCT_H.pack(length)
+    return b'\xdd' + _STRUCT_I.pack(length)
+
+
+def _pack(value, parts):
+    packer = _PACKERS.get(value.__class__)
+    if packer is not None:
+        packer(value, parts)
+    elif isinstance(value, bool):
+        _pack_bool(value, parts)
+    elif isinstance(value, int):
+        _pack_int(value, parts)
+    elif isinstance(value, str):
+        _pack_str(value, parts)
+    elif isinstance(value, (list, tuple)):
+        _pack_list(value, parts)
+    elif isinstance(value, dict):
+        _pack_dict(value, parts)
+    elif isinstance(value, float):
+        _pack_float(value, parts)
+    elif isinstance(value, (bytes, bytearray)):
+        _pack_bytes(value, parts)
+    else:
+        raise BinaryFormatException("Cannot encode value of type '" + value.__class__.__name__ + "'")
+
+
+def _pack_none(value, parts):
+    parts.append(b'\xc0')
+
+
+def _pack_bool(value, parts):
+    parts.append(b'\xc3' if value else b'\xc2')
+
+
+def _pack_str(value, parts):
+    data = value.encode('utf-8')
+    length = len(data)
+    if length < 32:
+        parts.append(_BYTES[0xa0 | length])
+    elif length <= 0xff:
+        parts.append(b'\xd9' + _STRUCT_B.pack(length))
+    elif length <= 0xffff:
+        parts.append(b'\xda' + _STRUCT_H.pack(length))
+    else:
+        parts.append(b'\xdb' + _STRUCT_I.pack(length))
+    parts.append(data)
+
+
+def _pack_list(value, parts):
+    parts.append(pack_array_header(len(value)))
+    for item in value:
+        _pack(item, parts)
+
+
+def _pack_dict(value, parts):
+    length = len(value)
+    if length < 16:
+        parts.append(_BYTES[0x80 | length])
+    elif length <= 0xffff:
+        parts.append(b'\xde' + _STRUCT_H.pack(length))
+    else:
+        parts.append(b'\xdf' + _STRUCT_I.pack(length))
+    for key in value:
+        _pack(key, parts)
+        _pack(value[key], parts)
+
+
+def _pack_float(value, parts):
+    parts.append(b'\xcb' + _STRUCT_d.pack(value))
+
+
+def _pack_bytes(value, parts):
+    length = len(value)
+    if length <= 0xff:
+        parts.append(b'\xc4' + _STRUCT_B.pack(length))
+    elif length <= 0xffff:
+        parts.append(b'\xc5' + _STRUCT_H.pack(length))
+    else:
+        parts.append(b'\xc6' + _STRUCT_I.pack(length))
+    parts.append(bytes(value))
+
+
+def _pack_int(value, parts):
+    if value >= 0:
+        if value < 0x80:
+            parts.append(_BYTES[value])
+        elif value <= 0xff:
+            parts.append(b'\xcc' + _STRUCT_B.pack(value))
+        elif value <= 0xffff:
+            parts.append(b'\xcd' + _STRUCT_H.pack(value))
+        elif value <= 0xffffffff:
+            parts.append(b'\xce' + _STRUCT_I.pack(value))
+        elif value <= 0xffffffffffffffff:
+            parts.append(b'\xcf' + _STRUCT_Q.pack(value))
+        else:
+            raise BinaryFormatException('Integer out of range')
+    elif value >= -32:
+        parts.append(_STRUCT_b.pack(value))
+    elif value >= -0x80:
+        parts.append(b'\xd0' + _STRUCT_b.pack(value))
+    elif value >= -0x8000:
+        parts.append(b'\xd1' + _STRUCT_h.pack(value))
+    elif value >= -0x80000000:
+        parts.append(b'\xd2' + _STRUCT_i.pack(value))
+    elif value >= -0x8000000000000000:
+        parts.append(b'\xd3' + _STRUCT_q.pack(value))
+    else:
+        raise BinaryFormatException('Integer out of range')
+
+
+def unpack(data):
+    try:
+        value, offset = _unpack(data, 0, 0)
+    except (IndexError, struct.error):
+        raise BinaryFormatException('Truncated data')
+    except UnicodeDecodeError:
+        raise BinaryFormatException('Bad string')
+    except TypeError:
+        # an array or map used as a map key
+        raise BinaryFormatException('Bad map key')
+    if offset != len(data):
+        raise BinaryFormatException('Trailing data')
+    return value
+
+
+def _unpack(data, offset, depth):
+    tag = data[offset]
+    offset += 1
+    if tag < 0x80:
+        return tag, offset
+    if tag >= 0xe0:
+        return tag - 0x100, offset
+    if 0xa0 <= tag <= 0xbf:
+        return _unpack_bytes(data, offset, tag & 0x1f).decode('utf-8'), offset + (tag & 0x1f)
+    if 0x90 <= tag <= 0x9f:
+        return _unpack_array(data, offset, tag & 0x0f, depth)
+    if 0x80 <= tag <= 0x8f:
+        return _unpack_map(data, offset, tag & 0x0f, depth)
+    if tag == 0xc0:
+        return None, offset
+    if tag == 0xc2:
+        return False, offset
+    if tag == 0xc3:
+        return True, offset
+    if tag in _FIXED:
+        fmt = _FIXED[tag]
+        return fmt.unpack_from(data, offset)[0], offset + fmt.size
+    if tag in _SIZED:
+        fmt, kind = _SIZED[tag]
+        length = fmt.unpack_from(data, offset)[0]
+        offset += fmt.size
+        if kind == 'str':
+            return _unpack_bytes(data, offset, length).decode('utf-8'), offset + length
+        if kind == 'bin':
+            return _unpack_bytes(data, offset, length), offset + length
+        if kind == 'array':
+            return _unpack_array(data, offset, length, depth)
+        return _unpack_map(data, offset, length, depth)
+    raise BinaryFormatException('Unknown type tag ' + hex(tag))
+
+
+def _unpack_bytes(data, offset, length):
+    end = offset + length
+    if end > len(data):
+        raise BinaryFormatException('Truncated data')
+    return bytes(data[offset:end])
+
+
+def _unpack_array(data, offset, length, depth):
+    if depth >= MAX_DEPTH:
+        raise BinaryFormatException('Nesting too deep')
+    values = []
+    for i in range(length):
+        value, offset = _unpack(data, offset, depth+1)
+        values.append(value)
+    return values, offset
+
+
+def _unpack_map(data, offset, length, depth):
+    if depth >= MAX_DEPTH:
+        raise BinaryFormatException('Nesting too deep')
+    values = {}
+    for i in range(length):
+        key, offset = _unpack(data, offset, depth+1)
+        value, offset = _unpack(data, offset, depth+1)
+        values[key] = value
+    return values, offset
+
+
+_FIXED = {
+    0xca: struct.Struct('>f'),
+    0xcb: _STRUCT_d,
+    0xcc: _STRUCT_B,
+    0xcd: _STRUCT_H,
+    0xce: _STRUCT_I,
+    0xcf: _STRUCT_Q,
+    0xd0: _STRUCT_b,
+    0xd1: _STRUCT_h,
+    0xd2: _STRUCT_i,
+    0xd3: _STRUCT_q
+}
+_SIZED = {
+    0xc4: (_STRUCT_B, 'bin'),
+    0xc5: (_STRUCT_H, 'bin'),
+    0xc6: (_STRUCT_I, 'bin'),
+    0xd9: (_STRUCT_B, 'str'),
+    0xda: (_STRUCT_H, 'str'),
+    0xdb: (_STRUCT_I, 'str'),
+    0xdc: (_STRUCT_H, 'array'),
+    0xdd: (_STRUCT_I, 'array'),
+    0xde: (_STRUCT_H, 'map'),
+    0xdf: (_STRUCT_I, 'map')
+}
+
+
+_PACKERS = {
+    type(None): _pack_none,
+    bool: _pack_bool,
+    int: _pack_int,
+    str: _pack_str,
+    list: _pack_list,
+    tuple: _pack_list,
+    dict: _pack_dict,
+    float: _pack_float,
+    bytes: _pack_bytes,
+    bytearray: _pack_bytes
+}
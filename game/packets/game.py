@@ -1,7 +1,9 @@
-from . import Packet
+from . import Packet, server
 
 
 class RequestSelectionPacket(Packet):
+    __slots__ = ('request_id', 'text', 'options')
+
     def __init__(self, request_id=None, text=None, options=None):
         super().__init__()
         self.request_id = request_id
@@ -9,7 +11,18 @@ class RequestSelectionPacket(Packet):
         self.options = options
 
 
+class CancelSelectionPacket(Packet):
+    """ The request timed out or was withdrawn; replies to it are ignored. """
+    __slots__ = ('request_id',)
+
+    def __init__(self, request_id=None):
+        super().__init__()
+        self.request_id = request_id
+
+
 class ReplySelectionPacket(Packet):
+    __slots__ = ('request_id', 'option_id')
+
     def __init__(self, request_id=None, option_id=None):
         super().__init__()
         self.request_id = request_id
@@ -17,30 +30,76 @@ class ReplySelectionPacket(Packet):
 
 
 class EndTurnPacket(Packet):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
 
 class EndGamePacket(Packet):
+    __slots__ = ('winner',)
+
     def __init__(self, winner=None):
         super().__init__()
         self.winner = winner
 
 
 class PlayCardPacket(Packet):
+    __slots__ = ('card_id',)
+
     def __init__(self, card_id=None):
         super().__init__()
         self.card_id = card_id
 
 
+class RejectPlayPacket(Packet):
+    """ A play_card the game did not make. card_id is the id played, None if it was
+        not an int; reason is one of REASONS. """
+    REASONS = ('not_your_turn', 'unknown_card', 'not_in_hand', 'no_minions_left', 'no_actions_left',
+               'no_target', 'cancelled')
+
+    __slots__ = ('card_id', 'reason')
+
+    def __init__(self, card_id=None, reason=None):
+        super().__init__()
+        self.card_id = card_id
+        self.reason = reason
+
+
 class SetCardsPacket(Packet):
     """
+    catalogs[hash]
     cards[{
         id
+        catalog -- index into catalogs
+        definition -- index into the catalog's cards
+        player -- if minion or action
+    }]
+    """
+    __slots__ = ('catalogs', 'cards')
+
+    def __init__(self, catalogs=None, cards=None):
+        super().__init__()
+        self.catalogs = catalogs
+        self.cards = cards
+
+
+class RequestCatalogPacket(Packet):
+    __slots__ = ('catalog',)
+
+    def __init__(self, catalog=None):
+        super().__init__()
+        self.catalog = catalog
+
+
+class SetCatalogPacket(Packet):
+    """
+    catalog -- hash
+    deck
+    cards[{
         name
         text
         type
-        player -- if minion or action
         power -- if minion
         power_threshold -- if base
         award_points { -- if base
@@ -50,8 +109,12 @@ class SetCardsPacket(Packet):
         }
     }]
     """
-    def __init__(self, cards):
+    __slots__ = ('catalog', 'deck', 'cards')
+
+    def __init__(self, catalog=None, deck=None, cards=None):
         super().__init__()
+        self.catalog = catalog
+        self.deck = deck
         self.cards = cards
 
 
@@ -79,12 +142,106 @@ class SetGameStatePacket(Packet):
             actions
         }
         hand[id]
+        moves [{ -- the plays open to the player, empty if it is not their turn
+            id
+            targets[id] -- bases or minions to choose from, empty for the field
+        }]
+        version -- acknowledge to receive patches
+        state_hash -- zobrist view hash of this state, 16 hex digits
     }
     """
-    def __init__(self, game_id=None, bases=None, players=None, turn=None, hand=None):
+    __slots__ = ('game_id', 'bases', 'players', 'turn', 'hand', 'version', 'state_hash', 'moves')
+
+    def __init__(self, game_id=None, bases=None, players=None, turn=None, hand=None, version=None,
+                 state_hash=None, moves=None):
         super().__init__()
         self.game_id = game_id
         self.bases = bases
         self.players = players
         self.turn = turn
         self.hand = hand
+        self.version = version
+        self.state_hash = state_hash
+        self.moves = moves
+
+
+class PatchGameStatePacket(Packet):
+    """
+    patch against the state of base_version {
+        bases [{ -- only changed bases, new bases are sent in full
+            id
+            power_total -- if changed
+            cards[card] -- only changed cards
+            removed_cards[id]
+        }]
+        removed_bases[id]
+        players [{ -- only changed players, new players are sent in full
+            name
+            points -- if changed
+            hand_size -- if changed
+            discard_added[id]
+            discard_removed[id]
+        }]
+        turn -- if changed
+        hand_added[id]
+        hand_removed[id]
+        moves -- if changed
+        version
+        state_hash -- of the patched state
+    }
+    """
+    __slots__ = ('game_id', 'base_version', 'version', 'bases', 'removed_bases', 'players', 'turn',
+                 'hand_added', 'hand_removed', 'state_hash', 'moves')
+
+    def __init__(self, game_id=None, base_version=None, version=None, bases=None, removed_bases=None,
+                 players=None, turn=None, hand_added=None, hand_removed=None, state_hash=None, moves=None):
+        super().__init__()
+        self.game_id = game_id
+        self.base_version = base_version
+        self.version = version
+        self.bases = bases
+        self.removed_bases = removed_bases
+        self.players = players
+        self.turn = turn
+        self.hand_added = hand_added
+        self.hand_removed = hand_removed
+        self.state_hash = state_hash
+        self.moves = moves
+
+
+class AckGameStatePacket(Packet):
+    """ state_hash, if given, is the view hash the client computed of the state it
+        holds at version; one that differs from the hash sent makes the next state
+        be sent in full. """
+    __slots__ = ('game_id', 'version', 'state_hash')
+
+    def __init__(self, game_id=None, version=None, state_hash=None):
+        super().__init__()
+        self.game_id = game_id
+        self.version = version
+        self.state_hash = state_hash
+
+
+class ResyncGameStatePacket(Packet):
+    __slots__ = ('game_id',)
+
+    def __init__(self, game_id=None):
+        super().__init__()
+        self.game_id = game_id
+
+
+PROTOCOL = server.PROTOCOL \
+    .outbound(RequestSelectionPacket, 'request_selection') \
+    .outbound(EndGamePacket, 'end_game') \
+    .outbound(SetCardsPacket, 'set_cards') \
+    .outbound(SetCatalogPacket, 'set_catalog') \
+    .outbound(SetGameStatePacket, 'set_state') \
+    .outbound(PatchGameStatePacket, 'patch_state') \
+    .outbound(CancelSelectionPacket, 'cancel_selection') \
+    .outbound(RejectPlayPacket, 'reject_play') \
+    .inbound(ReplySelectionPacket, 'reply_selection') \
+    .inbound(PlayCardPacket, 'play_card') \
+    .inbound(EndTurnPacket, 'end_turn') \
+    .inbound(RequestCatalogPacket, 'request_catalog') \
+    .inbound(AckGameStatePacket, 'ack_state') \
+    .inbound(ResyncGameStatePacket, 'resync_state')
@@ -1,12 +1,43 @@
-from . import Packet
+from . import Packet, Protocol
 
 
 class AuthPacket(Packet):
-    def __init__(self, name=None):
+    """
+    name
+    codecs[codec] -- optional, in order of preference
+    """
+    __slots__ = ('name', 'codecs')
+    defaults = {'codecs': None}
+
+    def __init__(self, name=None, codecs=None):
         super().__init__()
         self.name = name
+        self.codecs = codecs
+
+
+class SetCodecPacket(Packet):
+    """
+    codec -- used for all following packets
+    server_packets{name: id} -- binary ids of packets sent by the server
+    client_packets{name: id} -- binary ids of packets sent by the client
+    """
+    __slots__ = ('codec', 'server_packets', 'client_packets')
+
+    def __init__(self, codec=None, server_packets=None, client_packets=None):
+        super().__init__()
+        self.codec = codec
+        self.server_packets = server_packets
+        self.client_packets = client_packets
 
 
 class JoinGamePacket(Packet):
+    __slots__ = ('game_id',)
+
     def __init__(self, game_id=None):
         self.game_id = game_id
+
+
+PROTOCOL = Protocol() \
+    .inbound(AuthPacket, 'auth') \
+    .outbound(JoinGamePacket, 'join_game') \
+    .outbound(SetCodecPacket, 'set_codec')
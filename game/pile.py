@@ -1,33 +1,90 @@
-from random import shuffle
-from collections import deque
+from array import array
+from itertools import islice
+import random
+
+# the value of a slot below the bottom card, as card ids are not negative
+_EMPTY = -1
 
 
 class Pile(object):
-    def __init__(self, cards=[], shuffle=False):
-        self.cards = deque(cards)
+    """ A stack of cards, kept as an array of card ids from the bottom to the top.
+        The cards start at _start: the slots below are room for cards put on the
+        bottom, grown by the size of the pile when used up, so adding and removing
+        at either end takes constant (amortized) time and shuffling linear time.
+        The order comes from rng, the game's random stream, so a seeded game deals
+        the same cards every time. """
+    def __init__(self, rng=None, cards=(), shuffle=False):
+        self.rng = rng if rng is not None else random.Random()
+        self._ids = array('q')
+        self._start = 0
+        self._cards = {}
+        for card in cards:
+            self.add_top(card)
         if shuffle:
             self.shuffle()
 
     def get_top(self):
-        return self.cards[-1]
+        return self._cards[self._ids[-1]]
 
     def remove_top(self):
-        return self.cards.pop()
+        return self._cards.pop(self._ids.pop())
+
+    def remove_top_many(self, count):
+        """ Removes up to count cards from the top, top card first. """
+        count = min(count, len(self))
+        if count == 0:
+            return []
+        ids = self._ids[-count:]
+        del self._ids[-count:]
+        return [self._cards.pop(card_id) for card_id in reversed(ids)]
 
     def shuffle(self):
-        shuffle(self.cards)
+        ids = self._ids[self._start:]
+        self.rng.shuffle(ids)
+        self._ids = ids
+        self._start = 0
 
     def size(self):
-        return len(self.cards)
+        return len(self)
 
     def add_bottom(self, card):
-        self.cards.appendleft(card)
+        if self._start == 0:
+            room = max(len(self._ids), 8)
+            self._ids[0:0] = array('q', [_EMPTY]) * room
+            self._start = room
+        self._start -= 1
+        self._ids[self._start] = card.id
+        self._cards[card.id] = card
 
     def add_top(self, card):
-        self.cards.append(card)
+        self._ids.append(card.id)
+        self._cards[card.id] = card
+
+    def add(self, card):
+        self.add_top(card)
+
+    def remove(self, card):
+        """ Constant time for the top and the bottom card. """
+        if self._ids[-1] == card.id:
+            self._ids.pop()
+        elif self._ids[self._start] == card.id:
+            self._ids[self._start] = _EMPTY
+            self._start += 1
+        else:
+            self._ids.remove(card.id)
+        del self._cards[card.id]
+
+    def clear(self):
+        del self._ids[:]
+        self._start = 0
+        self._cards.clear()
+
+    def __contains__(self, card):
+        return card.id in self._cards
 
     def __iter__(self):
-        return self.cards.__iter__()
+        cards = self._cards
+        return (cards[card_id] for card_id in islice(self._ids, self._start, None))
 
     def __len__(self):
-        return self.cards.__len__()
+        return len(self._ids) - self._start
@@ -1,14 +1,17 @@
 from pile import Pile
+from zones import Zone
+import packets.game
+from sync import StateSync
 
 
 class Player(object):
     def __init__(self, user, game):
         self.user = user
         self.game = game
-        self.deck = Pile()
+        self.deck = Pile(game.random)
         self.decks = []
-        self.hand = []
-        self.discard = []
+        self.hand = Zone()
+        self.discard = Zone()
         self.points = 0
 
     def end_game(self, game):
@@ -19,16 +22,43 @@ class LocalPlayer(Player):
     def __init__(self, user, game):
         super().__init__(user, game)
         self._connections = []
+        self._state_syncs = {}
 
     def send_packet(self, packet):
         for conn in self._connections:
             conn.send_packet(packet)
 
+    def send_frame(self, frame):
+        for conn in self._connections:
+            conn.send_frame(frame)
+
+    def send_state(self, full_state, game_id, bases, players, turn, hand, moves=None, state_hash=None):
+        for conn in self._connections:
+            packet = self._state_syncs[conn].make_packet(game_id, bases, players, turn, hand, moves, state_hash)
+            if packet is None:
+                continue
+            if isinstance(packet, packets.game.SetGameStatePacket):
+                conn.send_frame(full_state.fill(hand=packet.hand, moves=packet.moves, version=packet.version,
+                                                state_hash=packet.state_hash))
+            else:
+                conn.send_packet(packet)
+
+    def acknowledge_state(self, connection, version, state_hash=None):
+        self._state_syncs[connection].acknowledge(version, state_hash)
+
+    def request_resync(self, connection):
+        self._state_syncs[connection].request_resync()
+
     def add_connection(self, connection):
+        self._state_syncs[connection] = StateSync()
         self._connections.append(connection)
 
     def remove_connection(self, connection):
         self._connections.remove(connection)
+        del self._state_syncs[connection]
+
+    def get_connections(self):
+        return list(self._connections)
 
     def has_connection(self, connection):
         return connection in self._connections
\ No newline at end of file
@@ -0,0 +1,229 @@
+import cards
+import intents
+from intents import Subscription
+
+
+class Rules(intents.IntentConsumer):
+    """ Resolves the core intents: moves cards between zones and keeps the power
+        totals of the bases in play up to date. A base whose total reaches its
+        breakpoint is marked as breaking when the change happens; breaking bases
+        are scored by score_bases.
+
+        Power changes are modifiers on the minions (see cards.Modifier). The rules
+        drop them when their duration ends and re-read the power of a minion only
+        when its modifiers, or what they depend on, changed. """
+    def __init__(self, game):
+        super().__init__()
+        self.game = game
+        self._breaking = {}
+        self._turn_dependents = {}
+        self._end_of_turn = {}
+
+    def get_subscriptions(self):
+        resolve = intents.PRIORITY_RESOLVE
+        return [Subscription(intents.PlayMinion, resolve, self._play_minion, zones=None),
+                Subscription(intents.PlayActionOnBase, resolve, self._play_action_on_base, zones=None),
+                Subscription(intents.PlayActionOnMinion, resolve, self._play_action_on_minion, zones=None),
+                Subscription(intents.PlayActionOnField, resolve, self._play_action_on_field, zones=None),
+                Subscription(intents.DestroyCard, resolve, self._discard, zones=None),
+                Subscription(intents.ReturnCardToHand, resolve, self._return_to_hand, zones=None),
+                Subscription(intents.PlaceCardOnDeckTop, resolve, self._place_on_deck_top, zones=None),
+                Subscription(intents.PlaceCardOnDeckBottom, resolve, self._place_on_deck_bottom, zones=None),
+                Subscription(intents.MoveMinion, resolve, self._move_minion, zones=None),
+                Subscription(intents.ModifyMinionPower, resolve, self._modify_minion_power, zones=None),
+                Subscription(intents.ModifyBasePowerThreshold, resolve, self._modify_base_power_threshold,
+                             zones=None),
+                Subscription(intents.BlowBase, resolve, self._blow_base, zones=None),
+                Subscription(intents.StartTurn, resolve, self._start_turn, zones=None),
+                Subscription(intents.EndTurn, resolve, self._end_turn, zones=None)]
+
+    def is_breaking(self, base):
+        return base in self._breaking
+
+    async def score_bases(self):
+        """ Scores the breaking bases in the order they are laid out. """
+        while len(self._breaking) > 0:
+            base = [b for b in self.game.bases if b in self._breaking][0]
+            await self.game.perform_intent(intents.BlowBase(base))
+
+    def get_memo(self):
+        """ The breaking bases and the minions with modifiers until the end of the turn,
+            by id, for snapshots. """
+        return tuple(b.id for b in self._breaking), tuple(m.id for m in self._end_of_turn)
+
+    def set_memo(self, memo):
+        """ Restores get_memo's memo once the game's cards are back in place. """
+        get_card = self.game.zones.get_card
+        breaking, end_of_turn = memo
+        self._breaking = dict.fromkeys([get_card(card_id) for card_id in breaking])
+        self._end_of_turn = dict.fromkeys([get_card(card_id) for card_id in end_of_turn])
+        self._turn_dependents = dict.fromkeys([m for m in self.game.board.get_minions()
+                                               if m.state.has_dependency(cards.DEPENDS_TURN)])
+
+    def discard_card(self, card):
+        self._take(card)
+        self._put_discard(card)
+
+    async def _play_minion(self, intent):
+        minion = intent.minion
+        self._take(minion)
+        state = cards.MinionOnBaseState(minion.player, intent.base, minion.base_power)
+        for modifier in minion.get_modifiers():
+            state.add_modifier(modifier)
+        self.game.zones.move(minion, intent.base.state.minions, state)
+        self._put_on_base(minion)
+
+    async def _play_action_on_base(self, intent):
+        self._take(intent.action)
+        self.game.zones.move(intent.action, intent.target.state.actions,
+                             cards.ActionOnBaseState(intent.action.player, intent.target))
+
+    async def _play_action_on_minion(self, intent):
+        self._take(intent.action)
+        self.game.zones.move(intent.action, intent.target.state.actions,
+                             cards.ActionOnMinionState(intent.action.player, intent.target))
+
+    async def _play_action_on_field(self, intent):
+        self._take(intent.action)
+        self.game.zones.move(intent.action, self.game.actions, cards.ActionOnFieldState(intent.action.player))
+
+    async def _discard(self, intent):
+        self.discard_card(intent.card)
+
+    async def _return_to_hand(self, intent):
+        card = intent.card
+        self._take(card)
+        self.game.zones.move(card, card.player.hand, cards.InHandState())
+
+    async def _place_on_deck_top(self, intent):
+        card = intent.card
+        self._take(card)
+        self.game.zones.move(card, card.player.deck, cards.InDeckState())
+
+    async def _place_on_deck_bottom(self, intent):
+        card = intent.card
+        self._take(card)
+        self.game.zones.move(card, card.player.deck, cards.InDeckState(), bottom=True)
+
+    async def _move_minion(self, intent):
+        minion = intent.minion
+        state = minion.state
+        if not isinstance(state, cards.MinionOnBaseState) or state.base == intent.base:
+            return
+        self._take_from_base(minion)
+        moved = cards.MinionOnBaseState(state.owner, intent.base, state.raw_power)
+        moved.actions = state.actions
+        for modifier in state.modifiers:
+            if modifier.duration != cards.WHILE_ON_BASE:
+                moved.add_modifier(modifier)
+        self.game.zones.move(minion, intent.base.state.minions, moved)
+        self._put_on_base(minion)
+
+    async def _modify_minion_power(self, intent):
+        minion = intent.minion
+        if not isinstance(minion.state, cards.MinionOnBaseState):
+            return
+        duration = intent.duration if intent.duration is not None else cards.WHILE_IN_PLAY
+        self._update_power(minion, minion.state.add_modifier, cards.Modifier(intent.source, intent.off, duration))
+        if duration == cards.UNTIL_END_OF_TURN:
+            self._end_of_turn[minion] = None
+
+    async def _start_turn(self, intent):
+        for minion in self._turn_dependents:
+            self._update_power(minion, minion.state.invalidate)
+
+    async def _end_turn(self, intent):
+        for minion in self._end_of_turn:
+            if isinstance(minion.state, cards.MinionOnBaseState):
+                self._update_power(minion, minion.state.remove_modifiers, cards.UNTIL_END_OF_TURN)
+        self._end_of_turn = {}
+
+    async def _modify_base_power_threshold(self, intent):
+        if isinstance(intent.base.state, cards.BaseInPlayState):
+            intent.base.state.power_threshold += intent.off
+            self._update_breaking(intent.base)
+
+    async def _blow_base(self, intent):
+        base = intent.base
+        state = base.state
+        for rank, players in state.get_ranking():
+            if rank < len(base.award_points):
+                for player in players:
+                    player.points += base.award_points[rank]
+
+        for minion in list(state.minions):
+            self.discard_card(minion)
+        for action in list(state.actions):
+            self.discard_card(action)
+        self._breaking.pop(base, None)
+
+        zones = self.game.zones
+        zones.move(base, self.game.base_discard, cards.BaseInDiscardState())
+        if len(self.game.base_deck) == 0:
+            while len(self.game.base_discard) > 0:
+                zones.move(self.game.base_discard.get_top(), self.game.base_deck, cards.BaseInDeckState())
+            zones.shuffle(self.game.base_deck)
+        replacement = self.game.base_deck.get_top()
+        zones.move(replacement, None, cards.BaseInPlayState(replacement.power_threshold))
+        self.game.bases[self.game.bases.index(base)] = replacement
+
+    def _take(self, card):
+        """ Removes the card from wherever it is, undoing what it did in play. """
+        state = card.state
+        if isinstance(state, cards.MinionOnBaseState):
+            for action in list(state.actions):
+                self.discard_card(action)
+            self._take_from_base(card)
+            self._turn_dependents.pop(card, None)
+            self._end_of_turn.pop(card, None)
+        elif isinstance(state, cards.ActionOnMinionState):
+            self._update_power(state.minion, state.minion.state.remove_modifiers, cards.WHILE_ATTACHED, card)
+        self.game.zones.remove(card)
+
+    def _put_discard(self, card):
+        self.game.zones.move(card, card.player.discard, cards.InDiscardState())
+
+    def _put_on_base(self, minion):
+        """ Counts in a minion already moved onto its base. """
+        state = minion.state
+        self.game.board.add_minion(minion)
+        self.game.zobrist.power_changed(minion, None, state.power)
+        self._add_power(state.base, state.owner, state.power)
+        if state.has_dependency(cards.DEPENDS_TURN):
+            self._turn_dependents[minion] = None
+        self._update_base_dependents(state.base)
+
+    def _take_from_base(self, minion):
+        state = minion.state
+        self.game.zones.remove(minion)
+        self.game.board.remove_minion(minion)
+        self.game.zobrist.power_changed(minion, state.power, None)
+        self._add_power(state.base, state.owner, -state.power)
+        self._update_base_dependents(state.base)
+
+    def _update_base_dependents(self, base):
+        for minion in base.state.minions:
+            if minion.state.has_dependency(cards.DEPENDS_BASE):
+                self._update_power(minion, minion.state.invalidate)
+
+    def _update_power(self, minion, change, *args):
+        """ Applies change to the minion's state and adds the difference in power to
+            the totals of its base. """
+        state = minion.state
+        power = state.power
+        change(*args)
+        if state.power != power:
+            self.game.board.update_power(minion)
+            self.game.zobrist.power_changed(minion, power, state.power)
+            self._add_power(state.base, state.owner, state.power - power)
+
+    def _add_power(self, base, player, power):
+        if power != 0:
+            base.state.add_power(player, power)
+            self._update_breaking(base)
+
+    def _update_breaking(self, base):
+        if base.state.is_breaking():
+            self._breaking[base] = None
+        else:
+            self._breaking.pop(base, None)
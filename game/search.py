@@ -0,0 +1,110 @@
+import random
+import cards
+from simulation import Agent, RandomAgent, fork
+
+# the value of a rollout in which no one won: 0.5, moved by the lead in points
+_DRAW = 0.5
+
+
+class SearchAgent(Agent):
+    """ Chooses its plays by flat Monte-Carlo search. Each candidate, ending the turn
+        included, is tried in rollouts: a fork of the game is put back in the current
+        state, the candidate is played and random agents play on for horizon turns,
+        two rounds by default. A candidate scores 1 for a win, 0 for a loss and for
+        unfinished rollouts 0.5 plus half the lead in points over the best other
+        player, relative to the points needed to win. The best total wins.
+        Selections are answered at random. The agent only knows what its player
+        sees: each rollout deals the other players new hands, see _deal_hidden. """
+    def __init__(self, rollouts=200, horizon=None, seed=None):
+        self.rollouts = rollouts
+        self.horizon = horizon
+        self.random = random.Random(seed)
+        self._source = None
+        self._fork = None
+        self._first_play = None
+
+    def choose_play(self, game, player, playable):
+        if len(playable) == 0:
+            return None
+        seat = game.players.index(player)
+        taken = game.take_snapshot()
+        simulated = self._get_fork(game, seat)
+        horizon = self.horizon if self.horizon is not None else 2*len(game.players)
+        candidates = playable+[None]
+        count = max(1, self.rollouts // len(candidates))
+
+        best, best_score = None, None
+        for candidate in candidates:
+            score = 0.0
+            for i in range(count):
+                simulated.restore_snapshot(taken)
+                self._deal_hidden(simulated, seat)
+                simulated.max_turns = simulated.turns+horizon
+                self._first_play.play_first(candidate.id if candidate is not None else None)
+                simulated.play_on()
+                score += _score(simulated, seat)
+            if best_score is None or score > best_score:
+                best, best_score = candidate, score
+        return best
+
+    def select(self, game, player, text, options):
+        return self.random.choice(options)
+
+    def _deal_hidden(self, simulated, seat):
+        """ The order of the decks and the hands of the other players are hidden
+            from the player in seat, so each rollout deals from decks shuffled anew,
+            the other players' hands dealt again from their hands and decks
+            together, as many cards as they hold. """
+        simulated.random.seed(self.random.getrandbits(32))
+        zones = simulated.zones
+        for other_seat, player in enumerate(simulated.players):
+            if other_seat == seat:
+                zones.shuffle(player.deck)
+                continue
+            size = len(player.hand)
+            for card in list(player.hand):
+                zones.move(card, player.deck, cards.InDeckState())
+            zones.shuffle(player.deck)
+            zones.deal(player.deck, size, player.hand, cards.InHandState)
+        zones.shuffle(simulated.base_deck)
+
+    def _get_fork(self, game, seat):
+        """ The fork rollouts are played in, made once per game searched. """
+        if self._source is not game:
+            agents = [RandomAgent(self.random.getrandbits(32)) for p in game.players]
+            self._first_play = _FirstPlayAgent(agents[seat])
+            agents[seat] = self._first_play
+            self._fork = fork(game, agents)
+            self._source = game
+        return self._fork
+
+
+class _FirstPlayAgent(Agent):
+    """ Makes the play being tried, then plays as agent. """
+    def __init__(self, agent):
+        self.agent = agent
+        self._card_id = None
+        self._pending = False
+
+    def play_first(self, card_id):
+        """ card_id None ends the turn. """
+        self._card_id = card_id
+        self._pending = True
+
+    def choose_play(self, game, player, playable):
+        if self._pending:
+            self._pending = False
+            return game.zones.get_card(self._card_id) if self._card_id is not None else None
+        return self.agent.choose_play(game, player, playable)
+
+    def select(self, game, player, text, options):
+        return self.agent.select(game, player, text, options)
+
+
+def _score(game, seat):
+    winner = game.get_winner()
+    if winner is not None:
+        return 1.0 if winner is game.players[seat] else 0.0
+    points = [p.points for p in game.players]
+    lead = points[seat] - max([p for s, p in enumerate(points) if s != seat])
+    return min(1.0, max(0.0, _DRAW + 0.5*lead / game.point_max))
@@ -4,6 +4,7 @@ from queue import Queue, Empty
 from websocket import AsyncioWebSocketServer
 import packets
 import packets.server
+import packets.game
 from user import User
 
 
@@ -34,12 +35,17 @@ class Server:
 
 
 class LocalServer(Server, threading.Thread):
-    def __init__(self, port):
+    """ With async_games, games run as coroutines on the websocket server's event loop
+        instead of each getting a thread of its own. """
+    def __init__(self, port, async_games=False):
         super().__init__()
         self.port = port
+        self.async_games = async_games
         self._users_by_name = {}
         self._users_lock = threading.RLock()
         self._games_by_id = {}
+        # user -> frozenset of games, replaced rather than mutated so reads need no lock
+        self._games_by_user = {}
         self._games_lock = threading.RLock()
         self._game_id_counter = 0
         self._server = AsyncioWebSocketServer(port, self._accept_connection)
@@ -68,10 +74,6 @@ class LocalServer(Server, threading.Thread):
 
     def _accept_connection(self, send_packet, close_connection):
         conn = LocalConnection(self, send_packet, close_connection)
-
-        conn.deserializer.register(packets.server.AuthPacket, 'auth')
-        conn.serializer.register(packets.server.JoinGamePacket, 'join_game')
-
         return conn.on_open, conn.on_message, conn.on_close
 
     def on_user_connect(self, user, conn):
@@ -84,8 +86,10 @@ class LocalServer(Server, threading.Thread):
         self._games_lock.acquire()
         try:
             self._game_id_counter += 1
-            game = LocalGame(self._game_id_counter, config)
+            game = LocalGame(self._game_id_counter, config, self._server.loop if self.async_games else None)
             self._games_by_id[game.id] = game
+            for user in game.users:
+                self._games_by_user[user] = self._games_by_user.get(user, frozenset()) | {game}
         finally:
             self._games_lock.release()
         return game
@@ -94,8 +98,17 @@ class LocalServer(Server, threading.Thread):
         self._games_lock.acquire()
         try:
             del self._games_by_id[game.id]
+            for user in game.users:
+                games = self._games_by_user[user] - {game}
+                if len(games) > 0:
+                    self._games_by_user[user] = games
+                else:
+                    del self._games_by_user[user]
         finally:
             self._games_lock.release()
+        for user in game.users:
+            for connection in game.get_connections(user):
+                game.remove_connection(user, connection)
 
     def get_game(self, game_id):
         self._games_lock.acquire()
@@ -105,27 +118,17 @@ class LocalServer(Server, threading.Thread):
             self._games_lock.release()
 
     def get_games_by_user(self, user):
-        games = []
-        self._games_lock.acquire()
-        try:
-            for game_id in self._games_by_id:
-                game = self._games_by_id[game_id]
-                if user in game.users:
-                    games.append(game)
-        finally:
-            self._games_lock.release()
-        return games
+        return list(self._games_by_user.get(user, ()))
 
     def handle_packet(self, connection, packet):
         print('[Server] Received packet ' + packet.__class__.__name__)
         if connection.user is None:
             if isinstance(packet, packets.server.AuthPacket):
+                connection.negotiate_codec(packet.codecs)
                 connection.user = self.create_user(packet.name)
                 self.on_user_connect(connection.user, connection)
-        else:
-            for game in self.get_games_by_user(connection.user):
-                if game.has_connection(connection.user, connection):
-                    game.receive_packet(connection.user, connection, packet)
+        elif connection.game is not None:
+            connection.game.receive_packet(connection.user, connection, packet)
 
     def handle_close(self, connection):
         if connection.user is not None:
@@ -135,21 +138,37 @@ class LocalServer(Server, threading.Thread):
 class LocalConnection:
     def __init__(self, server, send_message, close_connection):
         self.server = server
-        self.serializer = packets.PacketSerializer()
-        self.deserializer = packets.PacketSerializer()
+        self.protocol = packets.server.PROTOCOL
+        self.codec = packets.CODEC_JSON
+        self.game = None
         self._send_message = send_message
         self.close_connection = close_connection
         self.user = None
 
     def send_packet(self, packet):
-        message = self.serializer.serialize(packet)
+        message = self.protocol.serializer.serialize(packet, self.codec)
         self._send_message(message)
 
+    def send_frame(self, frame):
+        self._send_message(frame.encode(self.codec))
+
+    def negotiate_codec(self, codecs):
+        if codecs is None:
+            return
+        for codec in codecs:
+            if codec in packets.CODECS:
+                # the announcement itself is still sent with the old codec
+                self.send_packet(packets.server.SetCodecPacket(codec,
+                                                               packets.game.PROTOCOL.serializer.packet_ids(),
+                                                               packets.game.PROTOCOL.deserializer.packet_ids()))
+                self.codec = codec
+                return
+
     def on_open(self):
         pass
 
     def on_message(self, message):
-        packet = self.deserializer.deserialize(message)
+        packet = self.protocol.deserializer.deserialize(message)
         self.server.handle_packet(self, packet)
 
     def on_close(self):
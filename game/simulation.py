@@ -0,0 +1,177 @@
+import random
+import packets.game
+import snapshot
+from game import LocalGame, GameConfig
+
+
+class Agent:
+    """ Plays for a player of a HeadlessGame. """
+    def choose_play(self, game, player, playable):
+        """ One of the playable cards in the player's hand, or None to end the turn. """
+        raise NotImplementedError
+
+    def select(self, game, player, text, options):
+        """ The answer to a selection: one of options. """
+        raise NotImplementedError
+
+
+class RandomAgent(Agent):
+    """ Plays a random playable card, or ends its turn with chance end_chance, and
+        answers selections at random. """
+    def __init__(self, seed=None, end_chance=0.2):
+        self.random = random.Random(seed)
+        self.end_chance = end_chance
+
+    def choose_play(self, game, player, playable):
+        if len(playable) == 0 or self.random.random() < self.end_chance:
+            return None
+        return self.random.choice(playable)
+
+    def select(self, game, player, text, options):
+        return self.random.choice(options)
+
+
+def _first_play(game, player, playable):
+    return playable[0] if len(playable) > 0 else None
+
+
+def _first_option(game, player, text, options):
+    return options[0]
+
+
+class ScriptedAgent(Agent):
+    """ Plays and answers by the given functions, which take the same arguments as
+        choose_play and select. By default it plays its cards in hand order and
+        takes the first option. """
+    def __init__(self, choose_play=_first_play, select=_first_option):
+        self._choose_play = choose_play
+        self._select = select
+
+    def choose_play(self, game, player, playable):
+        return self._choose_play(game, player, playable)
+
+    def select(self, game, player, text, options):
+        return self._select(game, player, text, options)
+
+
+class HeadlessGame(LocalGame):
+    """ A game with no connections, threads or event loop: agents, one per player
+        in the order of the users, play the turns and answer the selections
+        directly. play runs the game from start to end in the calling thread.
+        A game that has no winner after max_turns turns ends without one. """
+    def __init__(self, id, config, agents, max_turns=500):
+        super().__init__(id, config)
+        self.agents = dict(zip(self.players, agents))
+        self.max_turns = max_turns
+        self.turns = 0
+        self.plays = 0
+        self._tried = {}
+
+    def _create_loop(self):
+        return None
+
+    def start(self):
+        raise NotImplementedError('Headless games are played with play')
+
+    def play(self):
+        """ Plays the game to its end; returns the winner, None if there is none. """
+        return self._drive(self.run())
+
+    def play_on(self):
+        """ Plays on to the end of the game from between two plays of a turn, where
+            a game restored from a snapshot is. Returns the winner as play does. """
+        return self._drive(self._play_on())
+
+    async def _play_on(self):
+        await self._play_turn()
+        while not self.is_won():
+            await self._take_turn()
+        self._end_game()
+
+    def _drive(self, coroutine):
+        try:
+            coroutine.send(None)
+        except StopIteration:
+            return self.get_winner()
+        coroutine.close()
+        raise RuntimeError('Headless game waited on something other than its agents')
+
+    def take_snapshot(self):
+        """ A snapshot of the game (see snapshot.take) with the turns taken, the cards
+            played and the plays tried this turn. """
+        return snapshot.take(self), self.turns, self.plays, tuple(c.id for c in self._tried)
+
+    def restore_snapshot(self, taken):
+        game_snapshot, self.turns, self.plays, tried = taken
+        snapshot.restore(self, game_snapshot)
+        self._tried = dict.fromkeys([self.zones.get_card(card_id) for card_id in tried])
+
+    def is_won(self):
+        return self.turns >= self.max_turns or super().is_won()
+
+    def _end_game(self):
+        pass
+
+    def _log(self, message):
+        pass
+
+    async def _take_turn(self):
+        self.turns += 1
+        self._tried = {}
+        await super()._take_turn()
+
+    async def play_card(self, player, card):
+        reason = await super().play_card(player, card)
+        if card not in player.hand:
+            self.plays += 1
+        return reason
+
+    async def _next_packet(self):
+        player = self.turn_state.player
+        card = self.agents[player].choose_play(self, player, self._get_playable(player))
+        if card is None:
+            return player, packets.game.EndTurnPacket()
+        # a play the game ignores is not offered again this turn
+        self._tried[card] = None
+        return player, packets.game.PlayCardPacket(card.id)
+
+    def _get_playable(self, player):
+        get_card = self.zones.get_card
+        return [card for card in (get_card(card_id) for card_id in self.get_legal_moves(player))
+                if card not in self._tried]
+
+    async def request_selection(self, player, text, options, timeout=None, default=None):
+        return self.agents[player].select(self, player, text, options)
+
+    async def request_selections(self, selections):
+        replies = {}
+        for id in selections:
+            selection = selections[id]
+            replies[id] = await self.request_selection(selection['player'], selection['text'],
+                                                       selection['options'])
+        return replies
+
+    def _send_cards(self):
+        pass
+
+    def _send_game_state(self):
+        pass
+
+    def broadcast_packet(self, packet):
+        pass
+
+
+def fork(game, agents, max_turns=500):
+    """ An independent headless copy of game, which is to be between plays, played on
+        by agents. The copy shares nothing mutable with game: its cards are created
+        anew from the players' decks and put in the state of a snapshot of game. """
+    config = GameConfig(game.users, [], game.point_max, seed=None)
+    copy = HeadlessGame(game.id, config, agents, max_turns)
+    for player, original in zip(copy.players, game.players):
+        player.decks = list(original.decks)
+    copy._create_cards()
+    if isinstance(game, HeadlessGame):
+        copy.restore_snapshot(game.take_snapshot())
+    else:
+        snapshot.restore(copy, snapshot.take(game))
+    return copy
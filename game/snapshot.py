@@ -0,0 +1,151 @@
+import cards
+from board import Board
+from game import TurnState
+
+ON_BASE = 0
+ON_MINION = 1
+ON_FIELD = 2
+
+
+class GameSnapshot:
+    """ The rules state of a game at a point between plays, encoded in tuples of card
+        ids and numbers with players as seat indices. It holds no reference into the
+        game, so it stays valid while the game goes on and can be restored into any
+        game whose cards have the same ids. """
+    __slots__ = ('players', 'bases', 'minions', 'actions', 'base_deck', 'base_discard', 'turn', 'rules',
+                 'memos', 'random', 'card_id_counter')
+
+
+def take(game):
+    """ A snapshot of game, which is to be between plays: no intent or selection pending. """
+    seats = dict((player, seat) for seat, player in enumerate(game.players))
+    snapshot = GameSnapshot()
+    snapshot.players = tuple((p.points, _ids(p.deck), _ids(p.hand), _ids(p.discard)) for p in game.players)
+
+    bases, minions, actions = [], [], []
+    for base in game.bases:
+        state = base.state
+        bases.append((base.id, state.power_threshold, state.power,
+                      tuple((seats[p], state.player_power[p]) for p in state.player_power)))
+        for action in state.actions:
+            actions.append((action.id, ON_BASE, seats[action.state.owner], base.id))
+    # in the order of the board, which is that of the minions on each base as well
+    for minion in game.board.get_minions():
+        minion_state = minion.state
+        minions.append((minion.id, seats[minion_state.owner], minion_state.base.id, minion_state.raw_power,
+                        minion_state.power, tuple(_encode_modifier(m) for m in minion_state.modifiers)))
+        for action in minion_state.actions:
+            actions.append((action.id, ON_MINION, seats[action.state.owner], minion.id))
+    for action in game.actions:
+        actions.append((action.id, ON_FIELD, seats[action.state.owner], None))
+    snapshot.bases = tuple(bases)
+    snapshot.minions = tuple(minions)
+    snapshot.actions = tuple(actions)
+
+    snapshot.base_deck = _ids(game.base_deck)
+    snapshot.base_discard = _ids(game.base_discard)
+    turn_state = game.turn_state
+    snapshot.turn = None if turn_state is None else (
+        seats[turn_state.player], tuple((k, v) for k, v in vars(turn_state).items() if k != 'player'))
+    snapshot.rules = game.rules.get_memo()
+    snapshot.memos = tuple((card.id, memo) for card, memo in ((c, c.get_memo()) for c in game.zones)
+                           if memo is not None)
+    snapshot.random = game.random.getstate()
+    snapshot.card_id_counter = game._card_id_counter
+    return snapshot
+
+
+def restore(game, snapshot):
+    """ Puts game in the state of snapshot, rebuilding its zones, board and rules state.
+        Cards are only re-subscribed with the router when their zone changes or they
+        are in play. """
+    zones = game.zones
+    get_card = zones.get_card
+    players = game.players
+    zobrist = game.zobrist
+
+    for minion in game.board.get_minions():
+        zobrist.power_changed(minion, minion.state.power, None)
+    zones.forget_zones()
+    for player in players:
+        player.deck.clear()
+        player.hand.clear()
+        player.discard.clear()
+    game.base_deck.clear()
+    game.base_discard.clear()
+    game.actions.clear()
+
+    in_deck, in_hand, in_discard = cards.InDeckState(), cards.InHandState(), cards.InDiscardState()
+    for player, (points, deck, hand, discard) in zip(players, snapshot.players):
+        player.points = points
+        zones.place_all(deck, player.deck, in_deck)
+        zones.place_all(hand, player.hand, in_hand)
+        zones.place_all(discard, player.discard, in_discard)
+    zones.place_all(snapshot.base_deck, game.base_deck, cards.BaseInDeckState())
+    zones.place_all(snapshot.base_discard, game.base_discard, cards.BaseInDiscardState())
+
+    game.bases = []
+    for base_id, power_threshold, power, player_power in snapshot.bases:
+        base = get_card(base_id)
+        state = cards.BaseInPlayState(power_threshold)
+        state.power = power
+        state.player_power = dict((players[seat], seat_power) for seat, seat_power in player_power)
+        zones.move(base, None, state)
+        game.bases.append(base)
+
+    board = Board()
+    game.board = board
+    for minion_id, seat, base_id, raw_power, power, modifiers in snapshot.minions:
+        minion = get_card(minion_id)
+        base = get_card(base_id)
+        state = cards.MinionOnBaseState(players[seat], base, raw_power)
+        for modifier in modifiers:
+            state.add_modifier(_decode_modifier(game, modifier))
+        state.set_cached_power(power)
+        zones.move(minion, base.state.minions, state)
+        board.add_minion(minion)
+        zobrist.power_changed(minion, None, power)
+
+    for action_id, kind, seat, target_id in snapshot.actions:
+        action = get_card(action_id)
+        if kind == ON_BASE:
+            target = get_card(target_id)
+            zones.move(action, target.state.actions, cards.ActionOnBaseState(players[seat], target))
+        elif kind == ON_MINION:
+            target = get_card(target_id)
+            zones.move(action, target.state.actions, cards.ActionOnMinionState(players[seat], target))
+        else:
+            zones.move(action, game.actions, cards.ActionOnFieldState(players[seat]))
+
+    if snapshot.turn is None:
+        game.turn_state = None
+    else:
+        seat, attributes = snapshot.turn
+        game.turn_state = TurnState(players[seat])
+        for name, value in attributes:
+            setattr(game.turn_state, name, value)
+    game.rules.set_memo(snapshot.rules)
+    memos = dict(snapshot.memos)
+    for card in zones:
+        card.set_memo(memos.get(card.id))
+    game.random.setstate(snapshot.random)
+    game._card_id_counter = snapshot.card_id_counter
+
+
+def _ids(cards_in_zone):
+    return tuple(card.id for card in cards_in_zone)
+
+
+def _encode_modifier(modifier):
+    """ A callable off is a method of the source card, kept by name. """
+    source_id = modifier.source.id if modifier.source is not None else None
+    off = modifier.off.__name__ if callable(modifier.off) else modifier.off
+    return source_id, off, modifier.duration, modifier.depends
+
+
+def _decode_modifier(game, encoded):
+    source_id, off, duration, depends = encoded
+    source = game.zones.get_card(source_id) if source_id is not None else None
+    if isinstance(off, str):
+        off = getattr(source, off)
+    return cards.Modifier(source, off, duration, depends)
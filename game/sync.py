@@ -0,0 +1,150 @@
+import threading
+import packets.game
+
+
+class StateSync:
+    """ Tracks the game states sent to a single connection. Until the connection
+        acknowledges a state version every state is sent in full; afterwards only
+        a patch against the last acknowledged state is sent. States equal to the
+        last one sent are not sent at all. Each state carries the zobrist view hash
+        of the player; a connection acknowledging a version with a different hash
+        is out of sync and gets the next state in full.
+
+        Acks arrive late: a state sent in full while none is acknowledged is kept
+        with the earlier ones, so an ack of any of them still sets the base for
+        patches. An ack of a version no longer kept, or older than the one
+        acknowledged, is stale and ignored. """
+
+    MAX_UNACKNOWLEDGED = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._states = {}
+        self._last_version = None
+        self._acknowledged = None
+        self._resync = False
+
+    def acknowledge(self, version, state_hash=None):
+        # version is whatever the client sent; only an int is looked up
+        if type(version) is not int:
+            return
+        self._lock.acquire()
+        try:
+            state = self._states.get(version)
+            if state is None or (self._acknowledged is not None and version < self._acknowledged):
+                return
+            if state_hash is not None and state_hash != state.state_hash:
+                self._resync = True
+                return
+            self._acknowledged = version
+            for v in [v for v in self._states if v < version]:
+                del self._states[v]
+        finally:
+            self._lock.release()
+
+    def request_resync(self):
+        self._lock.acquire()
+        try:
+            self._resync = True
+        finally:
+            self._lock.release()
+
+    def make_packet(self, game_id, bases, players, turn, hand, moves=None, state_hash=None):
+        state = _SyncedState(bases, players, turn, hand, moves, state_hash)
+        self._lock.acquire()
+        try:
+            if not self._resync and self._last_version is not None and self._states[self._last_version] == state:
+                return None
+
+            self._version += 1
+            version = self._version
+            if self._resync or len(self._states) >= self.MAX_UNACKNOWLEDGED:
+                self._resync = False
+                self._acknowledged = None
+                self._states = {}
+            if self._acknowledged is None:
+                self._states[version] = state
+                self._last_version = version
+                return packets.game.SetGameStatePacket(game_id, bases, players, turn, hand, version, state_hash,
+                                                       moves)
+
+            base_version = self._acknowledged
+            patch = state.diff(self._states[base_version])
+            self._states[version] = state
+            self._last_version = version
+            return packets.game.PatchGameStatePacket(game_id, base_version, version, state_hash=state_hash, **patch)
+        finally:
+            self._lock.release()
+
+
+class _SyncedState:
+    def __init__(self, bases, players, turn, hand, moves, state_hash):
+        self.bases = dict((b['id'], b) for b in bases)
+        self.players = dict((p['name'], p) for p in players)
+        self.turn = turn
+        self.hand = hand
+        self.moves = moves
+        self.state_hash = state_hash
+
+    def __eq__(self, other):
+        return (self.state_hash == other.state_hash and self.bases == other.bases and
+                self.players == other.players and self.turn == other.turn and self.hand == other.hand and
+                self.moves == other.moves)
+
+    def diff(self, old):
+        bases = []
+        for base_id in self.bases:
+            if base_id not in old.bases:
+                bases.append(self.bases[base_id])
+            elif self.bases[base_id] != old.bases[base_id]:
+                bases.append(_diff_base(self.bases[base_id], old.bases[base_id]))
+
+        players = []
+        for name in self.players:
+            if name not in old.players:
+                players.append(self.players[name])
+            elif self.players[name] != old.players[name]:
+                players.append(_diff_player(self.players[name], old.players[name]))
+
+        hand_added, hand_removed = _diff_ids(self.hand, old.hand)
+        return {
+            'bases': bases,
+            'removed_bases': [b for b in old.bases if b not in self.bases],
+            'players': players,
+            'turn': self.turn if self.turn != old.turn else None,
+            'hand_added': hand_added,
+            'hand_removed': hand_removed,
+            'moves': self.moves if self.moves != old.moves else None
+        }
+
+
+def _diff_base(new, old):
+    patch = {'id': new['id']}
+    if new['power_total'] != old['power_total']:
+        patch['power_total'] = new['power_total']
+    old_cards = dict((c['id'], c) for c in old['cards'])
+    new_ids = set()
+    cards = []
+    for card in new['cards']:
+        new_ids.add(card['id'])
+        if old_cards.get(card['id']) != card:
+            cards.append(card)
+    patch['cards'] = cards
+    patch['removed_cards'] = [c for c in old_cards if c not in new_ids]
+    return patch
+
+
+def _diff_player(new, old):
+    patch = {'name': new['name']}
+    for key in new:
+        if key != 'discard' and new[key] != old.get(key):
+            patch[key] = new[key]
+    patch['discard_added'], patch['discard_removed'] = _diff_ids(new['discard'], old['discard'])
+    return patch
+
+
+def _diff_ids(new, old):
+    old_ids = set(old)
+    new_ids = set(new)
+    return [i for i in new if i not in old_ids], [i for i in old if i not in new_ids]
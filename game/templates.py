@@ -0,0 +1,38 @@
+import threading
+import cards
+
+
+class DeckTemplate:
+    """ A deck compiled for creating the cards of a game in bulk: the classes of its
+        cards and bases in the order they take ids, and the states they start in.
+        The starting states hold nothing, so every card created shares them. """
+    def __init__(self, deck):
+        self.card_classes = tuple(deck.minions+deck.actions)
+        self.base_classes = tuple(deck.bases)
+        self.card_state = cards.InDeckState()
+        self.base_state = cards.BaseInDeckState()
+
+    def create_cards(self, player, first_id):
+        """ The deck's cards for player, with the ids from first_id on. """
+        return [card_class(first_id+idx, player) for idx, card_class in enumerate(self.card_classes)]
+
+    def create_bases(self, game, first_id):
+        """ The deck's bases, with the ids from first_id on. """
+        return [base_class(first_id+idx, game) for idx, base_class in enumerate(self.base_classes)]
+
+
+_templates_lock = threading.Lock()
+_templates_by_deck_class = {}
+
+
+def compile_deck(deck):
+    """ The template of the deck's class, compiled on first use. """
+    _templates_lock.acquire()
+    try:
+        template = _templates_by_deck_class.get(deck.__class__)
+        if template is None:
+            template = DeckTemplate(deck)
+            _templates_by_deck_class[deck.__class__] = template
+        return template
+    finally:
+        _templates_lock.release()
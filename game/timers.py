@@ -0,0 +1,101 @@
+import math
+import threading
+import time
+import traceback
+
+
+class TimerWheel:
+    """ Hashed timing wheel. Timers are kept in one of size slots, each covering tick
+        seconds, so scheduling and cancelling are O(1) however many timers are pending.
+        A single thread advances the wheel; callbacks run on that thread and must
+        hand any real work off (e.g. with loop.call_soon_threadsafe). """
+    def __init__(self, tick=0.1, size=512):
+        self.tick = tick
+        self._slots = [{} for i in range(size)]
+        self._position = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, delay, callback, *args):
+        ticks = max(1, int(math.ceil(delay / self.tick)))
+        timer = Timer(self, callback, args)
+        self._lock.acquire()
+        try:
+            timer._slot = (self._position + ticks) % len(self._slots)
+            timer._rounds = (ticks - 1) // len(self._slots)
+            self._slots[timer._slot][timer] = None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='TimerWheel', daemon=True)
+                self._thread.start()
+        finally:
+            self._lock.release()
+        return timer
+
+    def cancel(self, timer):
+        self._lock.acquire()
+        try:
+            if timer._slot is not None:
+                del self._slots[timer._slot][timer]
+                timer._slot = None
+        finally:
+            self._lock.release()
+
+    def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_tick += self.tick
+            self._advance()
+
+    def _advance(self):
+        expired = []
+        self._lock.acquire()
+        try:
+            self._position = (self._position + 1) % len(self._slots)
+            slot = self._slots[self._position]
+            for timer in list(slot):
+                if timer._rounds > 0:
+                    timer._rounds -= 1
+                else:
+                    del slot[timer]
+                    timer._slot = None
+                    expired.append(timer)
+        finally:
+            self._lock.release()
+        # the thread is shared by every game, so a failing callback must not end it
+        for timer in expired:
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                print('[TimerWheel] Timer callback failed')
+                traceback.print_exc()
+
+
+class Timer:
+    def __init__(self, wheel, callback, args):
+        self.callback = callback
+        self.args = args
+        self._wheel = wheel
+        self._slot = None
+        self._rounds = 0
+
+    def cancel(self):
+        self._wheel.cancel(self)
+
+
+_default_wheel = None
+_default_wheel_lock = threading.Lock()
+
+
+def default_wheel():
+    """ The wheel shared by all games of the process. """
+    global _default_wheel
+    _default_wheel_lock.acquire()
+    try:
+        if _default_wheel is None:
+            _default_wheel = TimerWheel()
+        return _default_wheel
+    finally:
+        _default_wheel_lock.release()
@@ -13,12 +13,17 @@ class WebSocketServer:
 
 
 class AsyncioWebSocketServer(WebSocketServer):
-    """ accept_connection: (send_message: String ->, close_connection: ->)
-                                -> open: ->, on_message: String ->, on_close: -> """
+    """ accept_connection: (send_message: String|bytes ->, close_connection: ->)
+                                -> open: ->, on_message: String|bytes ->, on_close: ->
+        Strings are sent as text frames and bytes as binary frames. """
     def __init__(self, port, accept_connection):
         super().__init__()
         self._thread = _AsyncioWebSocketThread(port, accept_connection)
 
+    @property
+    def loop(self):
+        return self._thread.loop
+
     def start(self):
         self._thread.start()
 
@@ -32,11 +37,14 @@ class _AsyncioWebSocketThread(threading.Thread):
         super().__init__()
         self._port = port
         self._accept_connection = accept_connection
-        self._loop = None
+        self._loop = asyncio.new_event_loop()
+
+    @property
+    def loop(self):
+        return self._loop
 
     def run(self):
         print('[WebSocketThread] Starting...')
-        self._loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self._loop)
 
         server = websockets.serve(self._handler, '127.0.0.1', self._port, loop=self._loop)
@@ -0,0 +1,218 @@
+import threading
+from collections import OrderedDict
+import cards
+
+_MASK = 0xffffffffffffffff
+
+# what a key is of
+KEY_CARD = 0
+KEY_POINTS = 1
+KEY_TURN = 2
+
+# where a card is
+DECK = 0
+HAND = 1
+DISCARD = 2
+ON_BASE = 3
+ON_MINION = 4
+ON_FIELD = 5
+BASE_IN_PLAY = 6
+BASE_DECK = 7
+BASE_DISCARD = 8
+HIDDEN = 9
+POWER = 10
+
+_HIDDEN_FROM_ALL = (DECK, ON_FIELD, BASE_DECK, BASE_DISCARD)
+
+
+def key(*values):
+    """ The 64-bit key of a tuple of non-negative integers: each value in turn is
+        added to the hash with the golden gamma and mixed by splitmix64's finalizer.
+        Keys are computed rather than drawn from a table, so a client can compute
+        them as well:
+            card    key(KEY_CARD, card id, where, argument), where being DECK, HAND or
+                    DISCARD of the seat argument, ON_BASE or ON_MINION of the card
+                    argument, BASE_IN_PLAY, ON_FIELD, BASE_DECK or BASE_DISCARD with
+                    argument 0, POWER with the minion's power as argument, or HIDDEN
+                    with argument 0 for a card the view does not show
+            points  key(KEY_POINTS, seat, points)
+            turn    key(KEY_TURN, seat, minions left, actions left) """
+    h = 0
+    for value in values:
+        h = (h + value + 0x9e3779b97f4a7c15) & _MASK
+        h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & _MASK
+        h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & _MASK
+        h ^= h >> 31
+    return h
+
+
+# keys of points and turns, and packed keys by (card id, where, argument, seats),
+# shared by all games
+_keys = {}
+_packed_keys = {}
+
+
+def _cached_key(*values):
+    cached = _keys.get(values)
+    if cached is None:
+        cached = key(*values)
+        _keys[values] = cached
+    return cached
+
+
+class ZobristHash:
+    """ A 64-bit hash of the rules state of a game: the XOR of the keys of where each
+        card is, the power of each minion in play, the points of each seat and the
+        turn. The keys of the cards are kept up to date as the cards move and the
+        powers change; points and turn are few and folded in when the hash is read.
+
+        Each seat has a view hash as well, of what the game state sent to the seat
+        shows: cards in its hand, in a discard or on a base in play are where they
+        are, others are HIDDEN. A client computes it from the state it holds, so
+        comparing the two detects a desync.
+
+        The hash and the views are packed 64 bits apiece into one integer, the hash
+        first, so a card move takes a single XOR of precomputed packed keys. """
+    def __init__(self, game):
+        self.game = game
+        self._seats = dict((player, seat) for seat, player in enumerate(game.players))
+        self._seat_count = len(game.players)
+        self._packed = 0
+
+    def card_moved(self, card, old_state):
+        """ Called by the zone registry after card's state changed from old_state. """
+        old = self._locate(card, old_state)
+        new = self._locate(card, card.state)
+        if old != new:
+            self._packed ^= self._get_packed_key(card.id, old) ^ self._get_packed_key(card.id, new)
+
+    def power_changed(self, minion, old, new):
+        """ Called by the rules when the power of a minion in play changed from old
+            to new, either being None when the minion enters or leaves play. """
+        if old is not None:
+            self._packed ^= self._get_packed_key(minion.id, (POWER, old))
+        if new is not None:
+            self._packed ^= self._get_packed_key(minion.id, (POWER, new))
+
+    def get_value(self):
+        return (self._packed & _MASK) ^ self._get_public()
+
+    def get_view(self, seat):
+        return ((self._packed >> 64*(seat+1)) & _MASK) ^ self._get_public()
+
+    def reset(self):
+        """ Recomputes the hash from scratch. """
+        self._packed = 0
+        for card in self.game.zones:
+            self._packed ^= self._get_packed_key(card.id, self._locate(card, card.state))
+        for minion in self.game.board.get_minions():
+            self.power_changed(minion, None, minion.state.power)
+
+    def _get_public(self):
+        public = 0
+        for seat, player in enumerate(self.game.players):
+            public ^= _cached_key(KEY_POINTS, seat, player.points)
+        turn_state = self.game.turn_state
+        if turn_state is not None:
+            public ^= _cached_key(KEY_TURN, self._seats[turn_state.player], turn_state.minions_left,
+                                  turn_state.actions_left)
+        return public
+
+    def _locate(self, card, state):
+        if state is None:
+            return None
+        state_class = state.__class__
+        if state_class is cards.MinionOnBaseState or state_class is cards.ActionOnBaseState:
+            return ON_BASE, state.base.id
+        if state_class is cards.ActionOnMinionState:
+            return ON_MINION, state.minion.id
+        if state_class is cards.InHandState:
+            return HAND, self._seats[card.player]
+        if state_class is cards.InDeckState:
+            return DECK, self._seats[card.player]
+        if state_class is cards.InDiscardState:
+            return DISCARD, self._seats[card.player]
+        if state_class is cards.ActionOnFieldState:
+            return ON_FIELD, 0
+        if state_class is cards.BaseInPlayState:
+            return BASE_IN_PLAY, 0
+        if state_class is cards.BaseInDeckState:
+            return BASE_DECK, 0
+        return BASE_DISCARD, 0
+
+    def _get_packed_key(self, card_id, location):
+        if location is None:
+            return 0
+        where, argument = location
+        cache_key = (card_id, where, argument, self._seat_count)
+        packed = _packed_keys.get(cache_key)
+        if packed is None:
+            location_key = key(KEY_CARD, card_id, where, argument)
+            hidden_key = key(KEY_CARD, card_id, HIDDEN, 0)
+            packed = location_key
+            for seat in range(self._seat_count):
+                if where in _HIDDEN_FROM_ALL or (where == HAND and seat != argument):
+                    packed |= hidden_key << 64*(seat+1)
+                else:
+                    packed |= location_key << 64*(seat+1)
+            _packed_keys[cache_key] = packed
+        return packed
+
+
+def format_hash(value):
+    """ The hash as sent to clients: 16 hex digits, as JSON numbers cannot hold 64 bits. """
+    return '%016x' % value
+
+
+_MISSING = object()
+
+
+class TranspositionTable:
+    """ Values by state hash, such as evaluations of a position or its legal plays,
+        holding at most capacity of them: storing one more evicts the least recently
+        used. A key may also be a tuple starting with the hash, to keep more than one
+        kind of value per state. Entries are looked up and stored under a lock. """
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        self._lock.acquire()
+        try:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+        finally:
+            self._lock.release()
+
+    def put(self, key, value):
+        self._lock.acquire()
+        try:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self._lock.release()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,157 @@
+class Zone(object):
+    """ Cards kept in the order they were added. Adding, removing and looking up a
+        card take constant time. """
+    def __init__(self, cards=()):
+        self._cards = dict.fromkeys(cards)
+
+    def add(self, card):
+        self._cards[card] = None
+
+    def remove(self, card):
+        del self._cards[card]
+
+    def clear(self):
+        self._cards.clear()
+
+    def __contains__(self, card):
+        return card in self._cards
+
+    def __iter__(self):
+        return self._cards.__iter__()
+
+    def __len__(self):
+        return self._cards.__len__()
+
+
+class ZoneRegistry(object):
+    """ Every card of a game by id, and the zone (a Zone or Pile) each one is in
+        and its position there. Cards move by move, which takes the card out of its
+        zone, sets its state and puts it in the new one, so a card's state and its
+        location always change together. Cards moved to zone None, such as the
+        bases in play, are in no zone. on_move, if given, is called with the card
+        and its old state whenever a card's state is set.
+
+        A position is a key rather than an index: a card put on top of a zone gets
+        one higher than any given before, a card put on the bottom of a Pile one
+        lower, so they order the cards of a zone without renumbering the others
+        when one moves. Piles are shuffled by shuffle, which numbers them anew. """
+    def __init__(self, on_move=None):
+        self._cards = {}
+        self._zones = {}
+        self._positions = {}
+        self._top = 0
+        self._bottom = 0
+        self._on_move = on_move
+
+    def add(self, card, zone, state):
+        self._cards[card.id] = card
+        self.move(card, zone, state)
+
+    def add_all(self, cards, zone, state):
+        """ Adds cards that are not registered with the intent router yet, so setting
+            their states does not re-subscribe them. """
+        on_move = self._on_move
+        for card in cards:
+            self._cards[card.id] = card
+            old_state = card.state
+            card.state = state
+            zone.add(card)
+            self._zones[card.id] = zone
+            self._top += 1
+            self._positions[card.id] = self._top
+            if on_move is not None:
+                on_move(card, old_state)
+
+    def place_all(self, card_ids, zone, state):
+        """ Puts the cards with the given ids, which are in no zone, into zone in state. """
+        cards, zones, positions, on_move = self._cards, self._zones, self._positions, self._on_move
+        top = self._top
+        for card_id in card_ids:
+            card = cards[card_id]
+            old_state = card.state
+            card.state = state
+            zone.add(card)
+            zones[card_id] = zone
+            top += 1
+            positions[card_id] = top
+            if on_move is not None:
+                on_move(card, old_state)
+        self._top = top
+
+    def move(self, card, zone, state, bottom=False):
+        """ bottom puts the card at the bottom of a Pile rather than on top. """
+        self.remove(card)
+        old_state = card.state
+        card.state = state
+        if zone is not None:
+            if bottom:
+                zone.add_bottom(card)
+                self._bottom -= 1
+                self._positions[card.id] = self._bottom
+            else:
+                zone.add(card)
+                self._top += 1
+                self._positions[card.id] = self._top
+            self._zones[card.id] = zone
+        if self._on_move is not None:
+            self._on_move(card, old_state)
+
+    def deal(self, pile, count, zone, make_state):
+        """ Moves up to count cards from the top of pile to zone at once, each with a
+            state from make_state. Returns the cards, top card first. """
+        dealt = pile.remove_top_many(count)
+        zones, positions, on_move = self._zones, self._positions, self._on_move
+        top = self._top
+        for card in dealt:
+            old_state = card.state
+            card.state = make_state()
+            zone.add(card)
+            zones[card.id] = zone
+            top += 1
+            positions[card.id] = top
+            if on_move is not None:
+                on_move(card, old_state)
+        self._top = top
+        return dealt
+
+    def shuffle(self, pile):
+        """ Shuffles pile, numbering the positions of its cards from the bottom. """
+        pile.shuffle()
+        positions = self._positions
+        top = self._top
+        for card in pile:
+            top += 1
+            positions[card.id] = top
+        self._top = top
+
+    def remove(self, card):
+        """ Takes the card out of its zone, leaving its state as it is. """
+        zone = self._zones.pop(card.id, None)
+        if zone is not None:
+            zone.remove(card)
+            del self._positions[card.id]
+
+    def forget_zones(self):
+        """ Forgets where every card is, leaving the zones as they are; for rebuilding
+            the zones from scratch. """
+        self._zones.clear()
+        self._positions.clear()
+
+    def get_card(self, card_id):
+        return self._cards.get(card_id)
+
+    def get_zone(self, card):
+        return self._zones.get(card.id)
+
+    def get_position(self, card):
+        """ The card's position key in its zone, None if it is in no zone. """
+        return self._positions.get(card.id)
+
+    def __contains__(self, card_id):
+        return card_id in self._cards
+
+    def __iter__(self):
+        return self._cards.values().__iter__()
+
+    def __len__(self):
+        return self._cards.__len__()